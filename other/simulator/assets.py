@@ -0,0 +1,163 @@
+"""
+Simulator assets (car mesh, mat texture), loaded once per process.
+
+Names are resolved relative to this package, not the working directory. The
+first load of a file stores its preprocessed form in CACHE_DIR under the hash
+of the file contents:
+    mesh:    interleaved GL_N3F_V3F vertex array (normals + positions) and bounding box
+    texture: RGB mip-map chain (level 0 is the full image)
+Later startups memory-map those .npy files instead of parsing the STL or
+decoding the image again. Editing an asset changes its hash, so stale entries
+are never used.
+"""
+import collections
+import hashlib
+import json
+import os
+
+import numpy as np
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(ASSET_DIR, '.asset_cache')
+
+CAR_STL = 'car.stl'
+CAR_SCALE = 0.002  # car.stl is in mm, drawn at twice the 1:1 scale
+
+MeshAsset = collections.namedtuple('MeshAsset', ['vertices', 'bbox_min', 'bbox_max'])
+MeshAsset.__doc__ = "Interleaved (N, 6) float32 normal+position rows and the (3,) bounding box corners."
+
+_loaded = {}  # (kind, path) -> asset, for this process
+
+
+def asset_path(name):
+    """Absolute path of an asset; relative names are taken relative to the package."""
+    return name if os.path.isabs(name) else os.path.join(ASSET_DIR, name)
+
+
+def file_hash(path):
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def _cache_file(digest, suffix):
+    return os.path.join(CACHE_DIR, f"{digest}-{suffix}.npy")
+
+
+def _save(path, array):
+    """Write a .npy atomically, so a crashed run never leaves a truncated cache entry."""
+    tmp = path + '.tmp.npy'
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+
+def mesh_vertex_array(vectors):
+    """
+    Interleaved float32 (normal, position) rows for GL_N3F_V3F, three per triangle.
+    vectors: (n, 3, 3) triangle corners. Each triangle gets its unit face normal
+    (0, 1, 0 for degenerate triangles), repeated for its three vertices.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    normals = np.cross(vectors[:, 1] - vectors[:, 0], vectors[:, 2] - vectors[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    degenerate = lengths <= 1e-6
+    normals = normals / np.where(degenerate, 1.0, lengths)[:, None]
+    normals[degenerate] = (0.0, 1.0, 0.0)
+    interleaved = np.empty((len(vectors), 3, 6), dtype=np.float32)
+    interleaved[:, :, :3] = normals[:, None, :]
+    interleaved[:, :, 3:] = vectors
+    return interleaved.reshape(-1, 6)
+
+
+def read_stl_triangles(path):
+    """(n, 3, 3) float32 triangle corners of an STL file (binary read directly, ASCII through numpy-stl)."""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.read(84)
+        if len(header) == 84:
+            count = int(np.frombuffer(header[80:84], dtype='<u4')[0])
+            if size == 84 + 50 * count:  # binary STL: 50-byte records
+                record = np.dtype([('normal', '<f4', 3), ('vectors', '<f4', (3, 3)), ('attr', '<u2')])
+                return np.fromfile(f, dtype=record, count=count)['vectors'].copy()
+    from stl import mesh  # ASCII STL
+    return mesh.Mesh.from_file(path).vectors.astype(np.float32)
+
+
+def load_mesh(name=CAR_STL):
+    """MeshAsset for an STL file (memory-mapped from the cache after the first run)."""
+    path = asset_path(name)
+    key = ('mesh', path)
+    if key in _loaded:
+        return _loaded[key]
+    digest = file_hash(path)
+    vertices_file, bbox_file = _cache_file(digest, 'mesh'), _cache_file(digest, 'bbox')
+    if os.path.exists(bbox_file) and os.path.exists(vertices_file):
+        vertices = np.load(vertices_file, mmap_mode='r')
+        bbox = np.load(bbox_file)
+    else:
+        triangles = read_stl_triangles(path)
+        vertices = mesh_vertex_array(triangles)
+        bbox = np.stack((triangles.reshape(-1, 3).min(axis=0), triangles.reshape(-1, 3).max(axis=0)))
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        _save(vertices_file, vertices)
+        _save(bbox_file, bbox)  # written last: marks the entry complete
+    asset = MeshAsset(vertices, bbox[0], bbox[1])
+    _loaded[key] = asset
+    return asset
+
+
+def _decode_rgb(path):
+    try:
+        from PIL import Image
+        with Image.open(path) as img:
+            return np.asarray(img.convert('RGB'))
+    except ImportError:
+        import cv2
+        image = cv2.imread(path)
+        if image is None:
+            raise FileNotFoundError(path)
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def mip_chain(image):
+    """Mip-map levels of an (H, W, 3) uint8 image: 2x2 box-filtered halves down to 1x1."""
+    levels = [np.ascontiguousarray(image)]
+    while levels[-1].shape[0] > 1 or levels[-1].shape[1] > 1:
+        level = levels[-1].astype(np.uint16)
+        h, w = level.shape[:2]
+        if h > 1:
+            level = level[:h // 2 * 2:2] + level[1:h // 2 * 2:2]
+        else:
+            level = level * 2
+        if w > 1:
+            level = level[:, :w // 2 * 2:2] + level[:, 1:w // 2 * 2:2]
+        else:
+            level = level * 2
+        levels.append(((level + 2) // 4).astype(np.uint8))
+    return levels
+
+
+def load_texture(name):
+    """RGB mip-map chain of an image, row 0 at the top (memory-mapped from the cache after the first run)."""
+    path = asset_path(name)
+    key = ('texture', path)
+    if key in _loaded:
+        return _loaded[key]
+    digest = file_hash(path)
+    index_file = os.path.join(CACHE_DIR, f"{digest}-texture.json")
+    if os.path.exists(index_file):
+        with open(index_file) as f:
+            count = json.load(f)['levels']
+        levels = [np.load(_cache_file(digest, f"mip{i}"), mmap_mode='r') for i in range(count)]
+    else:
+        levels = mip_chain(_decode_rgb(path))
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        for i, level in enumerate(levels):
+            _save(_cache_file(digest, f"mip{i}"), level)
+        with open(index_file + '.tmp', 'w') as f:
+            json.dump({'levels': len(levels), 'shape': list(levels[0].shape)}, f)
+        os.replace(index_file + '.tmp', index_file)  # written last: marks the entry complete
+    _loaded[key] = levels
+    return levels
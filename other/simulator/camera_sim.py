@@ -0,0 +1,301 @@
+"""
+CPU renderer for the robot's onboard camera: BGR frames from a robot pose,
+drawn with NumPy and OpenCV only (no GPU, no display), so vision.py can run in
+closed loop against the headless simulator.
+
+The scene is the Field: floor, orange/blue corner lines, black walls, magenta
+parking walls and red/green blocks. Ground polygons are drawn first, then the
+boxes far to near (painter's algorithm), each box only with its camera-facing
+faces, clipped against the near plane.
+
+RemapCameraSim draws the floor from the mat image instead (one cv2.remap per
+frame through precomputed floor-ray maps) and overlays the same boxes.
+
+Usage:
+    cam = CameraSim(field, width=640, height=480)   # or RemapCameraSim(field, ...)
+    frame = cam.render_robot(robot)   # or cam.render(x, z, heading_degrees)
+"""
+import math
+import os
+import numpy as np
+import cv2
+
+from assets import asset_path, load_texture
+from field import MAT_HALF_SIZE, MAT_TEXTURE
+from robot import Robot, CAMERA_FORWARD, CAMERA_FOV, CAMERA_HEIGHT, CAMERA_TILT
+
+# Scene colours (BGR)
+BACKGROUND_COLOR = (90, 90, 90)  # beyond the field / above the horizon
+FLOOR_COLOR = (235, 235, 235)  # white mat
+WALL_COLOR = (20, 20, 20)
+PARKING_COLOR = (255, 0, 255)
+BLOCK_COLORS = {'red': (55, 39, 238), 'green': (44, 214, 68)}  # FieldRenderer's block colours
+LINE_COLORS = {'orange': (0, 140, 255), 'blue': (200, 80, 0)}
+
+NEAR_PLANE = 0.01  # meters; geometry closer than this to the camera is clipped
+SUBPIXEL_SHIFT = 4  # fractional bits of the polygon vertices passed to OpenCV
+
+# Brightness of box faces by orientation, so adjacent faces stay distinguishable
+TOP_SHADE = 1.0
+X_FACE_SHADE = 0.85
+Z_FACE_SHADE = 0.7
+
+
+def _box_faces(cx, cz, w, d, h):
+    """Top and four side faces of a box as (vertices (4, 3), outward normal)."""
+    x0, x1 = cx - w / 2, cx + w / 2
+    z0, z1 = cz - d / 2, cz + d / 2
+    return [
+        ([(x0, h, z0), (x1, h, z0), (x1, h, z1), (x0, h, z1)], (0, 1, 0)),
+        ([(x1, 0, z0), (x1, h, z0), (x1, h, z1), (x1, 0, z1)], (1, 0, 0)),
+        ([(x0, 0, z0), (x0, 0, z1), (x0, h, z1), (x0, h, z0)], (-1, 0, 0)),
+        ([(x0, 0, z1), (x1, 0, z1), (x1, h, z1), (x0, h, z1)], (0, 0, 1)),
+        ([(x0, 0, z0), (x0, h, z0), (x1, h, z0), (x1, 0, z0)], (0, 0, -1)),
+    ]
+
+
+def _clip_near(points):
+    """Sutherland-Hodgman clip of a camera-space polygon against z >= NEAR_PLANE."""
+    clipped = []
+    n = len(points)
+    for i in range(n):
+        a, b = points[i], points[(i + 1) % n]
+        a_in, b_in = a[2] >= NEAR_PLANE, b[2] >= NEAR_PLANE
+        if a_in:
+            clipped.append(a)
+        if a_in != b_in:
+            t = (NEAR_PLANE - a[2]) / (b[2] - a[2])
+            clipped.append(a + t * (b - a))
+    return np.array(clipped)
+
+
+class CameraSim:
+    """
+    Renders the camera view of a Field for a robot pose.
+    The camera sits camera_height above and forward ahead of the robot origin,
+    pitched by tilt degrees (negative looks down), with a horizontal field of
+    view of fov degrees. render() returns a (height, width, 3) uint8 BGR frame;
+    the same buffer is reused by the next call, so copy it to keep it.
+    The scene geometry is rebuilt automatically when the field's blocks change.
+    """
+    def __init__(self, field, width=640, height=480, fov=CAMERA_FOV, camera_height=CAMERA_HEIGHT,
+                 tilt=CAMERA_TILT, forward=CAMERA_FORWARD):
+        self.field = field
+        self.width = width
+        self.height = height
+        self.camera_height = camera_height
+        self.forward = forward
+        self.tilt = math.radians(tilt)
+        self.focal = (width / 2) / math.tan(math.radians(fov) / 2)
+        self.cx = (width - 1) / 2
+        self.cy = (height - 1) / 2
+        self.frame = np.empty((height, width, 3), dtype=np.uint8)
+        self.background = np.full_like(self.frame, BACKGROUND_COLOR)  # copied in: faster than a broadcast fill
+        self._blocks = None
+        self.build_scene()
+
+    def build_scene(self):
+        """Collect ground polygons and box faces of the field into arrays."""
+        field = self.field
+        half = field.field_size / 2
+        ground = [([(-half, 0, -half), (half, 0, -half), (half, 0, half), (-half, 0, half)], FLOOR_COLOR)]
+        for (x0, z0), (x1, z1), color in field.line_segments():
+            length = math.hypot(x1 - x0, z1 - z0)
+            nx = -(z1 - z0) / length * field.line_width / 2
+            nz = (x1 - x0) / length * field.line_width / 2
+            ground.append(([(x0 + nx, 0, z0 + nz), (x1 + nx, 0, z1 + nz), (x1 - nx, 0, z1 - nz),
+                            (x0 - nx, 0, z0 - nz)], LINE_COLORS[color]))
+        self.ground_vertices = np.array([v for v, _ in ground], dtype=np.float64)
+        self.ground_colors = [c for _, c in ground]
+
+        boxes = [(box, WALL_COLOR) for box in field.wall_boxes()]
+        robot = field.robot
+        if robot is None:
+            field.set_robot(Robot())  # parking walls are spaced by the robot length
+        boxes += [(box, PARKING_COLOR) for box in field.parking_wall_boxes()]
+        if robot is None:
+            field.set_robot(None)
+        boxes += [((bx, bz, field.block_size, field.block_size, field.block_height), BLOCK_COLORS[color])
+                  for (bx, bz), color in field.blocks]
+
+        vertices, normals, colors, owners = [], [], [], []
+        for i, ((cx, cz, w, d, h), color) in enumerate(boxes):
+            for face, normal in _box_faces(cx, cz, w, d, h):
+                shade = TOP_SHADE if normal[1] else X_FACE_SHADE if normal[0] else Z_FACE_SHADE
+                vertices.append(face)
+                normals.append(normal)
+                colors.append(tuple(int(c * shade) for c in color))
+                owners.append(i)
+        self.face_vertices = np.array(vertices, dtype=np.float64)  # (F, 4, 3)
+        self.face_normals = np.array(normals, dtype=np.float64)
+        self.face_colors = colors
+        self.face_owner = np.array(owners)
+        self.box_bounds = np.array([(cx - w / 2, cx + w / 2, cz - d / 2, cz + d / 2)
+                                    for (cx, cz, w, d, h), _ in boxes])
+        self._blocks = list(field.blocks)
+
+    def camera_pose(self, x, z, heading):
+        """Camera position and world-to-camera rotation (rows: right, up, forward)."""
+        heading_rad = math.radians(heading)
+        forward = np.array([math.sin(heading_rad), 0.0, math.cos(heading_rad)])
+        right = np.array([math.cos(heading_rad), 0.0, -math.sin(heading_rad)])
+        up = np.array([0.0, 1.0, 0.0])
+        cos_t, sin_t = math.cos(self.tilt), math.sin(self.tilt)
+        view_forward = cos_t * forward + sin_t * up
+        view_up = -sin_t * forward + cos_t * up
+        position = np.array([x, self.camera_height, z]) + self.forward * forward
+        return position, np.stack((right, view_up, view_forward))
+
+    def _fill(self, points, color, pixels=None):
+        """Fill one camera-space polygon, clipping it to the near plane if needed."""
+        if pixels is None:
+            if (points[:, 2] < NEAR_PLANE).any():
+                if (points[:, 2] < NEAR_PLANE).all():
+                    return
+                points = _clip_near(points)
+            u = self.cx + self.focal * points[:, 0] / points[:, 2]
+            v = self.cy - self.focal * points[:, 1] / points[:, 2]
+            if u.max() < 0 or u.min() >= self.width or v.max() < 0 or v.min() >= self.height:
+                return
+            pixels = np.column_stack((u, v))
+        pixels = np.round(pixels * (1 << SUBPIXEL_SHIFT)).astype(np.int32)
+        cv2.fillConvexPoly(self.frame, pixels, color, shift=SUBPIXEL_SHIFT)
+
+    def draw_ground(self, x, z, heading, position, rotation):
+        """Background, floor and corner lines."""
+        np.copyto(self.frame, self.background)
+        ground = (self.ground_vertices - position) @ rotation.T
+        for points, color in zip(ground, self.ground_colors):
+            self._fill(points, color)
+
+    def draw_boxes(self, x, z, position, rotation):
+        """Walls, parking walls and blocks over the ground, from the farthest box to the nearest."""
+        to_camera = position - self.face_vertices[:, 0]
+        visible = np.einsum('ij,ij->i', self.face_normals, to_camera) > 0
+        b = self.box_bounds
+        dx = np.maximum(np.maximum(b[:, 0] - x, x - b[:, 1]), 0.0)
+        dz = np.maximum(np.maximum(b[:, 2] - z, z - b[:, 3]), 0.0)
+        box_distance = dx * dx + dz * dz
+        faces = np.flatnonzero(visible)
+        faces = faces[np.argsort(-box_distance[self.face_owner[faces]], kind='stable')]
+        camera_faces = (self.face_vertices[faces] - position) @ rotation.T
+
+        # Project every face at once; skip faces behind the camera or entirely off screen
+        depth = camera_faces[:, :, 2]
+        in_front = depth >= NEAR_PLANE
+        all_in_front = in_front.all(axis=1)
+        safe_depth = np.where(in_front, depth, 1.0)
+        u = self.cx + self.focal * camera_faces[:, :, 0] / safe_depth
+        v = self.cy - self.focal * camera_faces[:, :, 1] / safe_depth
+        off_screen = (u.max(axis=1) < 0) | (u.min(axis=1) >= self.width) | \
+                     (v.max(axis=1) < 0) | (v.min(axis=1) >= self.height)
+        draw = in_front.any(axis=1) & ~(all_in_front & off_screen)
+        for k in np.flatnonzero(draw):
+            pixels = np.column_stack((u[k], v[k])) if all_in_front[k] else None
+            self._fill(camera_faces[k], self.face_colors[faces[k]], pixels)
+
+    def render(self, x, z, heading):
+        """Camera frame for a robot at (x, z) with yaw `heading` in degrees (Robot.rotation[1])."""
+        if self.field.blocks != self._blocks:
+            self.build_scene()
+        position, rotation = self.camera_pose(x, z, heading)
+        self.draw_ground(x, z, heading, position, rotation)
+        self.draw_boxes(x, z, position, rotation)
+        return self.frame
+
+    def render_robot(self, robot):
+        return self.render(robot.position[0], robot.position[2], robot.rotation[1])
+
+
+def mat_texture(field, size=1024):
+    """
+    The field mat drawn from the Field (floor colour and corner lines), laid out
+    like MAT_TEXTURE, for when the mat image is not available.
+    """
+    scale = size / (2 * MAT_HALF_SIZE)
+    image = np.full((size, size, 3), FLOOR_COLOR, dtype=np.uint8)
+    thickness = max(1, int(round(field.line_width * scale)))
+    for (x0, z0), (x1, z1), color in field.line_segments():
+        p0 = (int(round((x0 + MAT_HALF_SIZE) * scale)), int(round((z0 + MAT_HALF_SIZE) * scale)))
+        p1 = (int(round((x1 + MAT_HALF_SIZE) * scale)), int(round((z1 + MAT_HALF_SIZE) * scale)))
+        cv2.line(image, p0, p1, LINE_COLORS[color], thickness, cv2.LINE_AA)
+    return image
+
+
+class RemapCameraSim(CameraSim):
+    """
+    CameraSim with the floor sampled from the mat image.
+    The camera is fixed on the chassis, so the floor point seen by every pixel
+    is constant in the robot frame (for pixels below the horizon). Those points
+    are computed once; each frame moves them to texture coordinates with two
+    cv2.addWeighted calls (a planar rotation and translation) and samples the
+    texture with a single cv2.remap. Walls and blocks are drawn over the floor
+    as in CameraSim.
+    texture: BGR image or asset path; by default MAT_TEXTURE when it exists, else mat_texture(field).
+    """
+    def __init__(self, field, width=640, height=480, texture=None, **camera):
+        super().__init__(field, width, height, **camera)
+        if texture is None:
+            texture = MAT_TEXTURE if os.path.exists(asset_path(MAT_TEXTURE)) else mat_texture(field)
+        if isinstance(texture, str):
+            # Full-resolution level of the cached RGB mip chain, as BGR
+            texture = cv2.cvtColor(np.asarray(load_texture(texture)[0]), cv2.COLOR_RGB2BGR)
+        self.texture = texture
+        self.texture_scale = (texture.shape[1] / (2 * MAT_HALF_SIZE), texture.shape[0] / (2 * MAT_HALF_SIZE))
+        self.build_floor_maps()
+
+    def build_floor_maps(self):
+        """Floor point (lateral, forward) in the robot frame of every pixel below the horizon."""
+        position, rotation = self.camera_pose(0.0, 0.0, 0.0)  # robot frame: x lateral, z forward
+        u = (np.arange(self.width) - self.cx) / self.focal
+        v = -(np.arange(self.height) - self.cy) / self.focal
+        # Ray directions in the robot frame; without roll the horizon is a pixel row
+        rays = u[None, :, None] * rotation[0] + v[:, None, None] * rotation[1] + rotation[2]
+        down = rays[:, 0, 1] < 0
+        self.floor_row = int(np.argmax(down)) if down.any() else self.height
+        rays = rays[self.floor_row:]
+        t = -position[1] / rays[:, :, 1]
+        self.floor_lateral = (position[0] + t * rays[:, :, 0]).astype(np.float32)
+        self.floor_forward = (position[2] + t * rays[:, :, 2]).astype(np.float32)
+        self._map_x = np.empty_like(self.floor_lateral)
+        self._map_y = np.empty_like(self.floor_lateral)
+
+    def draw_ground(self, x, z, heading, position, rotation):
+        """Background above the horizon, mat texture below."""
+        frame = self.frame
+        np.copyto(frame[:self.floor_row], self.background[:self.floor_row])
+        if self.floor_row >= self.height:
+            return
+        heading_rad = math.radians(heading)
+        cos_h, sin_h = math.cos(heading_rad), math.sin(heading_rad)
+        sx, sz = self.texture_scale
+        # World x = x + lateral*cos + forward*sin, z = z - lateral*sin + forward*cos, then to texels
+        cv2.addWeighted(self.floor_lateral, sx * cos_h, self.floor_forward, sx * sin_h,
+                        sx * (x + MAT_HALF_SIZE) - 0.5, dst=self._map_x)
+        cv2.addWeighted(self.floor_lateral, -sz * sin_h, self.floor_forward, sz * cos_h,
+                        sz * (z + MAT_HALF_SIZE) - 0.5, dst=self._map_y)
+        cv2.remap(self.texture, self._map_x, self._map_y, cv2.INTER_LINEAR, dst=frame[self.floor_row:],
+                  borderMode=cv2.BORDER_CONSTANT, borderValue=BACKGROUND_COLOR)
+
+
+# Example usage: python camera_sim.py [width height]
+if __name__ == '__main__':
+    import random
+    import sys
+    import time
+    from field import Field
+
+    field = Field(random.Random(0))
+    robot = Robot()
+    robot.rotation[1] = 0.0  # along the right corridor, toward the first corner
+    sizes = [(int(sys.argv[1]), int(sys.argv[2]))] if len(sys.argv) > 2 else [(640, 480), (320, 240), (160, 120)]
+    for renderer in (CameraSim, RemapCameraSim):
+        for width, height in sizes:
+            cam = renderer(field, width, height)
+            n = 500
+            start = time.perf_counter()
+            for i in range(n):
+                cam.render(1.0, -0.5 + i / n, 0.0)
+            print(f"{renderer.__name__} {width}x{height}: {n / (time.perf_counter() - start):.0f} frames/s")
+    cv2.imwrite('camera_sim.png', CameraSim(field).render_robot(robot))
+    print("Wrote camera_sim.png")
@@ -1,3 +1,4 @@
+import collections
 import time
 
 # Try to import RPi.GPIO, if not available, we're in simulation mode
@@ -5,9 +6,16 @@ try:
     import RPi.GPIO as GPIO
     SIMULATION_MODE = False
 except ImportError:
+    GPIO = None
     SIMULATION_MODE = True
     # print("Running in simulation mode - RPi.GPIO not available")
 
+# Optional: pigpio (needs the pigpiod daemon) for DMA-timed, lower-jitter PWM
+try:
+    import pigpio
+except ImportError:
+    pigpio = None
+
 # Pin Definitions (BCM Mode) - Configure these for your actual robot
 # Drive Motor (Connected to one side of L298N)
 DRIVE_MOTOR_IN1 = 17  # Example pin
@@ -17,7 +25,7 @@ DRIVE_MOTOR_ENA = 22  # Example PWM pin for speed control
 # Steering Motor (Connected to the other side of L298N or a separate L298N)
 STEER_MOTOR_IN1 = 5   # Example pin
 STEER_MOTOR_IN2 = 6   # Example pin
-STEER_MOTOR_ENB = 13  # Example PWM pin for speed/intensity control (optional for steering)
+STEER_MOTOR_ENB = 13  # Example PWM pin for steering intensity (proportional steering)
 
 # PWM Frequency
 PWM_FREQ = 100 # Hz
@@ -27,66 +35,204 @@ MAX_STEER_ANGLE_PHYSICAL = 30.0  # degrees, physical limit of the wheels
 # For simplicity, we'll assume direct control for now.
 # Later, we might need calibration or feedback for precise angle control.
 
-drive_pwm = None
-steer_pwm = None # May not be needed if steering is just on/off or fixed intensity
+LOW = 0
+HIGH = 1
+
+# --- Motor backends ---
+# A backend drives output pins and PWM duty cycles. All of them keep the last
+# written level/duty of every pin, which is what get_motor_states() reads.
+
+class MotorBackend:
+    name = 'base'
+
+    def __init__(self):
+        self.levels = {}
+        self.duties = {}
+
+    def setup_output(self, pin):
+        self.levels[pin] = LOW
+
+    def write(self, pin, level):
+        self.levels[pin] = level
+
+    def setup_pwm(self, pin, freq):
+        self.duties[pin] = 0
+
+    def set_duty(self, pin, duty):
+        self.duties[pin] = duty
+
+    def cleanup(self):
+        pass
+
+
+class RPiGPIOBackend(MotorBackend):
+    """RPi.GPIO: pins through sysfs/mmap, software-timed PWM."""
+    name = 'gpio'
+
+    def __init__(self):
+        if GPIO is None:
+            raise RuntimeError("RPi.GPIO is not available")
+        super().__init__()
+        self._pwm = {}
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setwarnings(False)
+
+    def setup_output(self, pin):
+        GPIO.setup(pin, GPIO.OUT, initial=GPIO.LOW)
+        super().setup_output(pin)
+
+    def write(self, pin, level):
+        GPIO.output(pin, GPIO.HIGH if level else GPIO.LOW)
+        super().write(pin, level)
+
+    def setup_pwm(self, pin, freq):
+        GPIO.setup(pin, GPIO.OUT)
+        pwm = GPIO.PWM(pin, freq)
+        pwm.start(0) # Start with 0% duty cycle (stopped)
+        self._pwm[pin] = pwm
+        super().setup_pwm(pin, freq)
+
+    def set_duty(self, pin, duty):
+        self._pwm[pin].ChangeDutyCycle(duty)
+        super().set_duty(pin, duty)
+
+    def cleanup(self):
+        for pwm in self._pwm.values():
+            pwm.stop()
+        GPIO.cleanup()
+
+
+class PigpioBackend(MotorBackend):
+    """pigpio: PWM timed by DMA in the pigpiod daemon, so it does not jitter with CPU load."""
+    name = 'pigpio'
+    PWM_RANGE = 1000  # duty resolution of 0.1%
+
+    def __init__(self, host=None):
+        if pigpio is None:
+            raise RuntimeError("pigpio is not available")
+        super().__init__()
+        self.pi = pigpio.pi(host) if host else pigpio.pi()
+        if not self.pi.connected:
+            raise RuntimeError("Cannot connect to pigpiod (start it with 'sudo pigpiod')")
+
+    def setup_output(self, pin):
+        self.pi.set_mode(pin, pigpio.OUTPUT)
+        self.pi.write(pin, 0)
+        super().setup_output(pin)
+
+    def write(self, pin, level):
+        self.pi.write(pin, 1 if level else 0)
+        super().write(pin, level)
+
+    def setup_pwm(self, pin, freq):
+        self.pi.set_mode(pin, pigpio.OUTPUT)
+        self.pi.set_PWM_frequency(pin, freq)
+        self.pi.set_PWM_range(pin, self.PWM_RANGE)
+        self.pi.set_PWM_dutycycle(pin, 0)
+        super().setup_pwm(pin, freq)
+
+    def set_duty(self, pin, duty):
+        self.pi.set_PWM_dutycycle(pin, int(round(duty * self.PWM_RANGE / 100)))
+        super().set_duty(pin, duty)
+
+    def cleanup(self):
+        for pin in self.duties:
+            self.pi.set_PWM_dutycycle(pin, 0)
+        for pin in self.levels:
+            self.pi.write(pin, 0)
+        self.pi.stop()
+
+
+class FakeBackend(MotorBackend):
+    """
+    Pure-Python backend for simulation and tests: no hardware, every pin write
+    and duty change is appended to `events` as (perf_counter time, kind, pin, value).
+    """
+    name = 'fake'
+
+    def __init__(self, max_events=100000):
+        super().__init__()
+        self.events = collections.deque(maxlen=max_events)
+
+    def setup_output(self, pin):
+        super().setup_output(pin)
+        self.events.append((time.perf_counter(), 'setup', pin, LOW))
+
+    def write(self, pin, level):
+        super().write(pin, level)
+        self.events.append((time.perf_counter(), 'pin', pin, level))
+
+    def setup_pwm(self, pin, freq):
+        super().setup_pwm(pin, freq)
+        self.events.append((time.perf_counter(), 'pwm', pin, freq))
+
+    def set_duty(self, pin, duty):
+        super().set_duty(pin, duty)
+        self.events.append((time.perf_counter(), 'duty', pin, duty))
+
+
+BACKENDS = {
+    'gpio': RPiGPIOBackend,
+    'pigpio': PigpioBackend,
+    'fake': FakeBackend,
+}
+
+backend = None
+drive_pwm = False  # True once the drive PWM is running
+steer_pwm = False  # True once the steering PWM is running
+
+def set_backend(choice=None):
+    """
+    Select the motor backend before setup_gpio(): a name from BACKENDS, a
+    MotorBackend instance, or None for RPi.GPIO when available, else the fake.
+    """
+    global backend
+    if choice is None:
+        choice = 'fake' if SIMULATION_MODE else 'gpio'
+    backend = BACKENDS[choice]() if isinstance(choice, str) else choice
+    return backend
 
 def setup_gpio():
     """Initializes GPIO pins for motor control."""
     global drive_pwm, steer_pwm
-    
-    if SIMULATION_MODE:
-        # print("Simulation: GPIO setup skipped")
-        return
 
-    GPIO.setmode(GPIO.BCM)
-    GPIO.setwarnings(False)
+    if backend is None:
+        set_backend()
 
     # Drive Motor Pins
-    GPIO.setup(DRIVE_MOTOR_IN1, GPIO.OUT)
-    GPIO.setup(DRIVE_MOTOR_IN2, GPIO.OUT)
-    GPIO.setup(DRIVE_MOTOR_ENA, GPIO.OUT)
-    GPIO.output(DRIVE_MOTOR_IN1, GPIO.LOW)
-    GPIO.output(DRIVE_MOTOR_IN2, GPIO.LOW)
+    backend.setup_output(DRIVE_MOTOR_IN1)
+    backend.setup_output(DRIVE_MOTOR_IN2)
     try:
-        drive_pwm = GPIO.PWM(DRIVE_MOTOR_ENA, PWM_FREQ)
-        drive_pwm.start(0) # Start with 0% duty cycle (stopped)
+        backend.setup_pwm(DRIVE_MOTOR_ENA, PWM_FREQ)
+        drive_pwm = True
     except Exception as e:
-        # print(f"Error initializing drive_pwm: {e}")
-        drive_pwm = None
+        print(f"Error initializing drive_pwm: {e}")
+        drive_pwm = False
 
 
     # Steering Motor Pins
-    GPIO.setup(STEER_MOTOR_IN1, GPIO.OUT)
-    GPIO.setup(STEER_MOTOR_IN2, GPIO.OUT)
-    GPIO.output(STEER_MOTOR_IN1, GPIO.LOW)
-    GPIO.output(STEER_MOTOR_IN2, GPIO.LOW)
-    
-    # Optional: PWM for steering intensity if needed
-    # GPIO.setup(STEER_MOTOR_ENB, GPIO.OUT)
-    # try:
-    #     steer_pwm = GPIO.PWM(STEER_MOTOR_ENB, PWM_FREQ)
-    #     steer_pwm.start(0)
-    # except Exception as e:
-    #     print(f"Error initializing steer_pwm: {e}")
-    #     steer_pwm = None
-    print("GPIO setup complete.")
+    backend.setup_output(STEER_MOTOR_IN1)
+    backend.setup_output(STEER_MOTOR_IN2)
+    try:
+        backend.setup_pwm(STEER_MOTOR_ENB, PWM_FREQ)
+        steer_pwm = True
+    except Exception as e:
+        print(f"Error initializing steer_pwm: {e}")
+        steer_pwm = False
+    if backend.name != 'fake':
+        print(f"GPIO setup complete ({backend.name}).")
 
 def move_forward(speed_percent):
     """
     Moves the robot forward.
     speed_percent: 0-100
     """
-    if SIMULATION_MODE:
-        # print(f"Simulation: Moving forward at {speed_percent}%")
-        move_forward.last_speed = speed_percent  # Store the last speed
-        return
-
     if not drive_pwm:
         # print("Drive PWM not initialized.")
         return
-    GPIO.output(DRIVE_MOTOR_IN1, GPIO.HIGH)
-    GPIO.output(DRIVE_MOTOR_IN2, GPIO.LOW)
-    drive_pwm.ChangeDutyCycle(max(0, min(100, speed_percent)))
+    backend.write(DRIVE_MOTOR_IN1, HIGH)
+    backend.write(DRIVE_MOTOR_IN2, LOW)
+    backend.set_duty(DRIVE_MOTOR_ENA, max(0, min(100, speed_percent)))
     # print(f"Moving forward at {speed_percent}%")
 
 def move_backward(speed_percent):
@@ -94,50 +240,35 @@ def move_backward(speed_percent):
     Moves the robot backward.
     speed_percent: 0-100
     """
-    if SIMULATION_MODE:
-        # print(f"Simulation: Moving backward at {speed_percent}%")
-        return
-
     if not drive_pwm:
         # print("Drive PWM not initialized.")
         return
-    GPIO.output(DRIVE_MOTOR_IN1, GPIO.LOW)
-    GPIO.output(DRIVE_MOTOR_IN2, GPIO.HIGH)
-    drive_pwm.ChangeDutyCycle(max(0, min(100, speed_percent)))
+    backend.write(DRIVE_MOTOR_IN1, LOW)
+    backend.write(DRIVE_MOTOR_IN2, HIGH)
+    backend.set_duty(DRIVE_MOTOR_ENA, max(0, min(100, speed_percent)))
     # print(f"Moving backward at {speed_percent}%")
 
 def stop_drive_motor():
     """Stops the drive motor."""
-    if SIMULATION_MODE:
-        # print("Simulation: Drive motor stopped")
-        return
-
-    if not drive_pwm:
-        # print("Drive PWM not initialized (already stopped or error).")
-        # Still try to set IN pins to LOW in case PWM failed but pins are set
-        GPIO.output(DRIVE_MOTOR_IN1, GPIO.LOW)
-        GPIO.output(DRIVE_MOTOR_IN2, GPIO.LOW)
+    if backend is None:
         return
-    GPIO.output(DRIVE_MOTOR_IN1, GPIO.LOW)
-    GPIO.output(DRIVE_MOTOR_IN2, GPIO.LOW)
-    drive_pwm.ChangeDutyCycle(0)
+    backend.write(DRIVE_MOTOR_IN1, LOW)
+    backend.write(DRIVE_MOTOR_IN2, LOW)
+    if drive_pwm:
+        backend.set_duty(DRIVE_MOTOR_ENA, 0)
     # print("Drive motor stopped.")
 
 def steer_left(intensity_percent=100):
     """
     Turns the steering motor to the left.
-    intensity_percent: 0-100 (how hard to turn, if PWM is used for steering)
-                       For now, it's effectively on/off.
+    intensity_percent: 0-100 (steering motor duty cycle on STEER_MOTOR_ENB)
     """
-    if SIMULATION_MODE:
-        # print(f"Simulation: Steering left at {intensity_percent}%")
-        steer_left.last_direction = 'left'
+    if backend is None:
         return
-
-    GPIO.output(STEER_MOTOR_IN1, GPIO.HIGH)
-    GPIO.output(STEER_MOTOR_IN2, GPIO.LOW)
-    # if steer_pwm:
-    #     steer_pwm.ChangeDutyCycle(max(0, min(100, intensity_percent)))
+    backend.write(STEER_MOTOR_IN1, HIGH)
+    backend.write(STEER_MOTOR_IN2, LOW)
+    if steer_pwm:
+        backend.set_duty(STEER_MOTOR_ENB, max(0, min(100, intensity_percent)))
     # print(f"Steering left at {intensity_percent}% intensity")
 
 def steer_right(intensity_percent=100):
@@ -145,15 +276,12 @@ def steer_right(intensity_percent=100):
     Turns the steering motor to the right.
     intensity_percent: 0-100
     """
-    if SIMULATION_MODE:
-        # print(f"Simulation: Steering right at {intensity_percent}%")
-        steer_left.last_direction = 'right'
+    if backend is None:
         return
-
-    GPIO.output(STEER_MOTOR_IN1, GPIO.LOW)
-    GPIO.output(STEER_MOTOR_IN2, GPIO.HIGH)
-    # if steer_pwm:
-    #     steer_pwm.ChangeDutyCycle(max(0, min(100, intensity_percent)))
+    backend.write(STEER_MOTOR_IN1, LOW)
+    backend.write(STEER_MOTOR_IN2, HIGH)
+    if steer_pwm:
+        backend.set_duty(STEER_MOTOR_ENB, max(0, min(100, intensity_percent)))
     # print(f"Steering right at {intensity_percent}% intensity")
 
 def center_steering(): # Or stop_steering_motor
@@ -161,47 +289,46 @@ def center_steering(): # Or stop_steering_motor
     For a simple DC motor without feedback, this just stops it.
     More advanced control would require sensors or stepper motor.
     """
-    if SIMULATION_MODE:
-        # print("Simulation: Steering centered")
-        steer_left.last_direction = 'center'
+    if backend is None:
         return
-
-    GPIO.output(STEER_MOTOR_IN1, GPIO.LOW)
-    GPIO.output(STEER_MOTOR_IN2, GPIO.LOW)
-    # if steer_pwm:
-    #     steer_pwm.ChangeDutyCycle(0)
+    backend.write(STEER_MOTOR_IN1, LOW)
+    backend.write(STEER_MOTOR_IN2, LOW)
+    if steer_pwm:
+        backend.set_duty(STEER_MOTOR_ENB, 0)
     # print("Steering motor stopped (centered).")
 
 def cleanup_gpio():
     """Cleans up GPIO resources."""
-    if SIMULATION_MODE:
-        # print("Simulation: GPIO cleanup skipped")
+    global backend, drive_pwm, steer_pwm
+    if backend is None:
         return
-
     # print("Cleaning up GPIO...")
-    if drive_pwm:
-        drive_pwm.stop()
-    # if steer_pwm:
-    #     steer_pwm.stop()
-    GPIO.cleanup()
+    backend.cleanup()
+    backend = None
+    drive_pwm = False
+    steer_pwm = False
     # print("GPIO cleanup complete.")
 
-# For simulation mode, we'll add a method to get the current motor states
 def get_motor_states():
-    """Returns the current motor states for simulation."""
-    if not SIMULATION_MODE:
+    """Returns the current motor states (last levels written through the backend)."""
+    if backend is None:
         return None
-    
-    # In simulation mode, we'll return the last commanded states
-    # This can be used by the simulation to update the robot's position
+    levels = backend.levels
+    in1, in2 = levels.get(DRIVE_MOTOR_IN1, LOW), levels.get(DRIVE_MOTOR_IN2, LOW)
+    duty = backend.duties.get(DRIVE_MOTOR_ENA, 0)
+    drive_speed = duty if in1 and not in2 else -duty if in2 and not in1 else 0
+    s1, s2 = levels.get(STEER_MOTOR_IN1, LOW), levels.get(STEER_MOTOR_IN2, LOW)
+    steering_direction = 'left' if s1 and not s2 else 'right' if s2 and not s1 else 'center'
     return {
-        'drive_speed': getattr(move_forward, 'last_speed', 0),
-        'steering_direction': getattr(steer_left, 'last_direction', 'center')
+        'drive_speed': drive_speed,
+        'steering_direction': steering_direction
     }
 
-# Example usage (for testing this file directly)
+# Example usage (for testing this file directly): python control.py [gpio|pigpio|fake]
 if __name__ == '__main__':
+    import sys
     try:
+        set_backend(sys.argv[1] if len(sys.argv) > 1 else None)
         setup_gpio()
 
         print("Testing Drive Motor...")
@@ -217,15 +344,23 @@ if __name__ == '__main__':
         time.sleep(1) # Duration of steer depends on motor speed and desired angle
         center_steering() # Stop steering motor
         time.sleep(0.5)
-        
+
         steer_right()
         time.sleep(1)
         center_steering()
         time.sleep(1)
 
+        # Command latency: time to apply one steering change through the backend
+        n = 1000
+        start = time.perf_counter()
+        for i in range(n):
+            steer_left() if i % 2 else steer_right()
+        center_steering()
+        print(f"{backend.name}: {(time.perf_counter() - start) / n * 1e6:.1f} us per steering command")
+
     except KeyboardInterrupt:
         print("Test interrupted by user.")
     except Exception as e:
         print(f"An error occurred: {e}")
     finally:
-        cleanup_gpio() 
\ No newline at end of file
+        cleanup_gpio()
@@ -1,12 +1,17 @@
+import math
 import random
-import numpy as np
-from OpenGL.GL import *
 
 Open_challenge = False
 
+# Field mat image and the square (meters from the centre) it covers on the floor;
+# row 0 of the image is at z = -MAT_HALF_SIZE, column 0 at x = -MAT_HALF_SIZE
+MAT_TEXTURE = "Screenshot_1.jpg"
+MAT_HALF_SIZE = 1.6
+
 class Field:
+    """Field layout: walls, blocks and parking space (headless; drawing lives in render.FieldRenderer)."""
     Randomization = True  # If False, do not randomize obstacles or robot initial position
-    def __init__(self):
+    def __init__(self, rng=None):
         self.field_size = 4.0  # 4x4 meter field
         self.block_size = 0.05  # 50mm blocks
         self.block_height = 0.1  # 100mm height
@@ -22,7 +27,8 @@ class Field:
         self.wall_height = 0.1  # 10cm high walls
         self.inner_wall_size = 0.8  # 0.8x0.8m inner walls
         self.outer_wall_size = 3.0  # 3x3m outer walls
-        self.generate_random_blocks()
+        self.line_width = 0.02  # 20mm orange/blue corner lines
+        self.generate_random_blocks(rng)
         
         # Reference to robot for trajectory rendering
         self.robot = None
@@ -31,8 +37,11 @@ class Field:
         """Set the robot reference for trajectory rendering"""
         self.robot = robot
     
-    def generate_random_blocks(self):
-        """Randomly place 3 red and 3 green blocks on the 16 user-specified positions (left, right, up, down) around the white square."""
+    def generate_random_blocks(self, rng=None):
+        """Randomly place 3 red and 3 green blocks on the 16 user-specified positions (left, right, up, down) around the white square.
+        rng: optional random.Random for reproducible layouts (defaults to the global random module)."""
+        if rng is None:
+            rng = random
         if Open_challenge:
             self.blocks = []
             return
@@ -50,7 +59,7 @@ class Field:
         self.blocks = []
         num_blocks = 6  # 3 red and 3 green blocks
         colors = ['red', 'green'] * (num_blocks // 2)
-        random.shuffle(colors)
+        rng.shuffle(colors)
 
         # Define positions for each side, separated into outer and inner positions
         side_positions = {
@@ -74,7 +83,7 @@ class Field:
 
         # Randomly select sides to place blocks
         sides = ['left', 'right', 'up', 'down']
-        random.shuffle(sides)
+        rng.shuffle(sides)
         
         # Place blocks ensuring the rule is followed
         remaining_blocks = num_blocks
@@ -87,100 +96,52 @@ class Field:
             
             if blocks_on_side == 2:
                 # If placing 2 blocks, use only outer positions
-                positions = random.sample(side_positions[side]['outer'], 2)
+                positions = rng.sample(side_positions[side]['outer'], 2)
             else:
                 # If placing 1 block, can use any position
                 all_positions = side_positions[side]['outer'] + side_positions[side]['inner']
-                positions = random.sample(all_positions, 1)
+                positions = rng.sample(all_positions, 1)
             
             # Add blocks to the list
             for pos in positions:
                 self.blocks.append((pos, colors[len(self.blocks)]))
                 remaining_blocks -= 1
     
-    def render_walls(self):
-        """Render the black walls for both inner (0.8x0.8m) and outer (3x3m) areas as solid cuboids."""
-        glColor3f(0.0, 0.0, 0.0)  # Black color
-        glMaterialfv(GL_FRONT, GL_AMBIENT, [0.1, 0.1, 0.1, 1.0])
-        glMaterialfv(GL_FRONT, GL_DIFFUSE, [0.2, 0.2, 0.2, 1.0])
-        glMaterialfv(GL_FRONT, GL_SPECULAR, [0.1, 0.1, 0.1, 1.0])
-        glMaterialf(GL_FRONT, GL_SHININESS, 10.0)
-
-        def draw_box(center_x, center_z, width, depth, height):
-            x1 = center_x - width / 2
-            x2 = center_x + width / 2
-            z1 = center_z - depth / 2
-            z2 = center_z + depth / 2
-            y1 = 0.0
-            y2 = height
-            glBegin(GL_QUADS)
-            # Bottom face
-            glNormal3f(0.0, -1.0, 0.0)
-            glVertex3f(x1, y1, z1)
-            glVertex3f(x2, y1, z1)
-            glVertex3f(x2, y1, z2)
-            glVertex3f(x1, y1, z2)
-            # Top face
-            glNormal3f(0.0, 1.0, 0.0)
-            glVertex3f(x1, y2, z1)
-            glVertex3f(x1, y2, z2)
-            glVertex3f(x2, y2, z2)
-            glVertex3f(x2, y2, z1)
-            # Front face
-            glNormal3f(0.0, 0.0, 1.0)
-            glVertex3f(x1, y1, z2)
-            glVertex3f(x2, y1, z2)
-            glVertex3f(x2, y2, z2)
-            glVertex3f(x1, y2, z2)
-            # Back face
-            glNormal3f(0.0, 0.0, -1.0)
-            glVertex3f(x1, y1, z1)
-            glVertex3f(x1, y2, z1)
-            glVertex3f(x2, y2, z1)
-            glVertex3f(x2, y1, z1)
-            # Left face
-            glNormal3f(-1.0, 0.0, 0.0)
-            glVertex3f(x1, y1, z1)
-            glVertex3f(x1, y1, z2)
-            glVertex3f(x1, y2, z2)
-            glVertex3f(x1, y2, z1)
-            # Right face
-            glNormal3f(1.0, 0.0, 0.0)
-            glVertex3f(x2, y1, z1)
-            glVertex3f(x2, y2, z1)
-            glVertex3f(x2, y2, z2)
-            glVertex3f(x2, y1, z2)
-            glEnd()
-
+    def wall_boxes(self):
+        """Black walls of the inner (0.8x0.8m) and outer (3x3m) squares as (center_x, center_z, width, depth, height) boxes."""
         wall_thickness = 0.01  # 10mm thick walls
         height = self.wall_height
-
-        # Inner square (0.8x0.8m)
-        inner_half = self.inner_wall_size / 2
-        # Top wall
-        draw_box(0, inner_half + wall_thickness/2, self.inner_wall_size + wall_thickness, wall_thickness, height)
-        # Bottom wall
-        draw_box(0, -inner_half - wall_thickness/2, self.inner_wall_size + wall_thickness, wall_thickness, height)
-        # Left wall
-        draw_box(-inner_half - wall_thickness/2, 0, wall_thickness, self.inner_wall_size + wall_thickness, height)
-        # Right wall
-        draw_box(inner_half + wall_thickness/2, 0, wall_thickness, self.inner_wall_size + wall_thickness, height)
-
-        # Outer square (3x3m)
-        outer_half = 1.5  # 3.0m / 2
-        # Top wall
-        draw_box(0, outer_half + wall_thickness/2, self.outer_wall_size + wall_thickness, wall_thickness, height)
-        # Bottom wall
-        draw_box(0, -outer_half - wall_thickness/2, self.outer_wall_size + wall_thickness, wall_thickness, height)
-        # Left wall
-        draw_box(-outer_half - wall_thickness/2, 0, wall_thickness, self.outer_wall_size + wall_thickness, height)
-        # Right wall
-        draw_box(outer_half + wall_thickness/2, 0, wall_thickness, self.outer_wall_size + wall_thickness, height)
-
-    def render_parking_space(self):
-        """Render the magenta parking space walls as two vertical cuboids, spaced by 2.4x robot length."""
+        boxes = []
+        for half, size in ((self.inner_wall_size / 2, self.inner_wall_size), (self.outer_wall_size / 2, self.outer_wall_size)):
+            boxes.append((0, half + wall_thickness/2, size + wall_thickness, wall_thickness, height))  # Top wall
+            boxes.append((0, -half - wall_thickness/2, size + wall_thickness, wall_thickness, height))  # Bottom wall
+            boxes.append((-half - wall_thickness/2, 0, wall_thickness, size + wall_thickness, height))  # Left wall
+            boxes.append((half + wall_thickness/2, 0, wall_thickness, size + wall_thickness, height))  # Right wall
+        return boxes
+
+    def line_segments(self):
+        """
+        Orange and blue corner lines on the mat as ((x0, z0), (x1, z1), color) segments.
+        Both lines of a corner start at the inner wall corner and reach the outer wall
+        30 degrees off the x or z axis; driving counter-clockwise the orange line comes first.
+        """
+        inner = self.inner_wall_size / 2
+        outer = self.outer_wall_size / 2
+        offset = (outer - inner) * math.tan(math.radians(30))
+        segments = []
+        for sx, sz in ((1, 1), (-1, 1), (-1, -1), (1, -1)):
+            start = (sx * inner, sz * inner)
+            x_line = (start, (sx * outer, sz * (inner + offset)))
+            z_line = (start, (sx * (inner + offset), sz * outer))
+            orange, blue = (x_line, z_line) if sx * sz > 0 else (z_line, x_line)
+            segments.append((orange[0], orange[1], 'orange'))
+            segments.append((blue[0], blue[1], 'blue'))
+        return segments
+
+    def parking_wall_boxes(self):
+        """The two magenta parking space walls, spaced by 2.4x robot length, as (center_x, center_z, width, depth, height) boxes."""
         if not self.robot:
-            return  # Need robot reference for length
+            return []  # Need robot reference for length
         robot_length = self.robot.get_length_x()
         gap = 2.4 * robot_length  # 60% more than 1.5x
         wall_width = 0.02  # 2 cm thick
@@ -188,71 +149,8 @@ class Field:
         wall_length = 0.20  # 20 cm long
         z_center = -1.5 + wall_length / 2 + 0.02  # 2cm offset from field edge
         x_offset = gap / 2
-        # Left wall
-        glPushMatrix()
-        glColor3f(1.0, 0.0, 1.0)  # Magenta
-        glMaterialfv(GL_FRONT, GL_AMBIENT, [0.2, 0.0, 0.2, 1.0])
-        glMaterialfv(GL_FRONT, GL_DIFFUSE, [1.0, 0.0, 1.0, 1.0])
-        glMaterialfv(GL_FRONT, GL_SPECULAR, [0.2, 0.2, 0.2, 1.0])
-        glMaterialf(GL_FRONT, GL_SHININESS, 30.0)
-        self._draw_box(-x_offset, z_center, wall_width, wall_length, wall_height)
-        glPopMatrix()
-        # Right wall
-        glPushMatrix()
-        glColor3f(1.0, 0.0, 1.0)  # Magenta
-        glMaterialfv(GL_FRONT, GL_AMBIENT, [0.2, 0.0, 0.2, 1.0])
-        glMaterialfv(GL_FRONT, GL_DIFFUSE, [1.0, 0.0, 1.0, 1.0])
-        glMaterialfv(GL_FRONT, GL_SPECULAR, [0.2, 0.2, 0.2, 1.0])
-        glMaterialf(GL_FRONT, GL_SHININESS, 30.0)
-        self._draw_box(x_offset, z_center, wall_width, wall_length, wall_height)
-        glPopMatrix()
-
-    def _draw_box(self, center_x, center_z, width, depth, height):
-        """Draw a box centered at (center_x, center_z) with given dimensions."""
-        x1 = center_x - width / 2
-        x2 = center_x + width / 2
-        z1 = center_z - depth / 2
-        z2 = center_z + depth / 2
-        y1 = 0.0
-        y2 = height
-        glBegin(GL_QUADS)
-        # Bottom face
-        glNormal3f(0.0, -1.0, 0.0)
-        glVertex3f(x1, y1, z1)
-        glVertex3f(x2, y1, z1)
-        glVertex3f(x2, y1, z2)
-        glVertex3f(x1, y1, z2)
-        # Top face
-        glNormal3f(0.0, 1.0, 0.0)
-        glVertex3f(x1, y2, z1)
-        glVertex3f(x1, y2, z2)
-        glVertex3f(x2, y2, z2)
-        glVertex3f(x2, y2, z1)
-        # Front face
-        glNormal3f(0.0, 0.0, 1.0)
-        glVertex3f(x1, y1, z2)
-        glVertex3f(x2, y1, z2)
-        glVertex3f(x2, y2, z2)
-        glVertex3f(x1, y2, z2)
-        # Back face
-        glNormal3f(0.0, 0.0, -1.0)
-        glVertex3f(x1, y1, z1)
-        glVertex3f(x1, y2, z1)
-        glVertex3f(x2, y2, z1)
-        glVertex3f(x2, y1, z1)
-        # Left face
-        glNormal3f(-1.0, 0.0, 0.0)
-        glVertex3f(x1, y1, z1)
-        glVertex3f(x1, y1, z2)
-        glVertex3f(x1, y2, z2)
-        glVertex3f(x1, y2, z1)
-        # Right face
-        glNormal3f(1.0, 0.0, 0.0)
-        glVertex3f(x2, y1, z1)
-        glVertex3f(x2, y2, z1)
-        glVertex3f(x2, y2, z2)
-        glVertex3f(x2, y1, z2)
-        glEnd()
+        return [(-x_offset, z_center, wall_width, wall_length, wall_height),
+                (x_offset, z_center, wall_width, wall_length, wall_height)]
 
     def get_parking_space_options(self):
         """Return two possible robot positions and rotations (facing each magenta block, spaced by 2.4x robot length)."""
@@ -271,104 +169,6 @@ class Field:
         rot2 = [0.0, -90.0, 0.0]
         return [(pos1, rot1), (pos2, rot2)]
 
-    def render(self, draw_trajectory=True):
-        """Render all blocks in the field and mark the origin (0,0) with a yellow circle for reference."""
-        # Draw walls first
-        self.render_walls()
-        
-        # Draw yellow circle at the origin
-        glPushMatrix()
-        glTranslatef(0.0, 0.01, 0.0)  # Slightly above ground to avoid z-fighting
-        glColor3f(1.0, 1.0, 0.0)
-        glBegin(GL_LINE_LOOP)
-        num_segments = 64
-        radius = 0.12
-        for i in range(num_segments):
-            theta = 2.0 * np.pi * i / num_segments
-            x = radius * np.cos(theta)
-            z = radius * np.sin(theta)
-            glVertex3f(x, 0, z)
-        glEnd()
-        glPopMatrix()
-
-        # Render robot trajectory if available and allowed
-        if draw_trajectory and self.robot and self.robot.trajectory:
-            glPushAttrib(GL_LINE_BIT | GL_ENABLE_BIT)
-            glDisable(GL_LIGHTING)
-            glLineWidth(4.0)  # Thicker line
-            glColor3f(0.0, 0.8, 0.0)  # Green color
-            glBegin(GL_LINE_STRIP)
-            for x, z in self.robot.trajectory:
-                glVertex3f(x, 0.02, z)  # Slightly above ground to avoid z-fighting
-            glEnd()
-            glPopAttrib()
-
-        for (x, z), color in self.blocks:
-            glPushMatrix()
-            glTranslatef(x, 0.0, z)  # Place blocks directly on ground (removed elevation)
-            
-            # Set color
-            if color == 'red':
-                glColor3f(238/255, 39/255, 55/255)  # RGB (238, 39, 55)
-                glMaterialfv(GL_FRONT, GL_AMBIENT, [0.2, 0.0, 0.0, 1.0])
-                glMaterialfv(GL_FRONT, GL_DIFFUSE, [238/255, 39/255, 55/255, 1.0])
-            else:  # green
-                glColor3f(68/255, 214/255, 44/255)  # RGB (68, 214, 44)
-                glMaterialfv(GL_FRONT, GL_AMBIENT, [0.0, 0.2, 0.0, 1.0])
-                glMaterialfv(GL_FRONT, GL_DIFFUSE, [68/255, 214/255, 44/255, 1.0])
-            
-            glMaterialfv(GL_FRONT, GL_SPECULAR, [0.2, 0.2, 0.2, 1.0])
-            glMaterialf(GL_FRONT, GL_SHININESS, 30.0)
-            
-            # Draw block as a cube
-            glBegin(GL_QUADS)
-            # Top face
-            glNormal3f(0.0, 1.0, 0.0)
-            glVertex3f(-self.block_size/2, self.block_height, -self.block_size/2)
-            glVertex3f(-self.block_size/2, self.block_height, self.block_size/2)
-            glVertex3f(self.block_size/2, self.block_height, self.block_size/2)
-            glVertex3f(self.block_size/2, self.block_height, -self.block_size/2)
-            
-            # Bottom face
-            glNormal3f(0.0, -1.0, 0.0)
-            glVertex3f(-self.block_size/2, 0, -self.block_size/2)
-            glVertex3f(self.block_size/2, 0, -self.block_size/2)
-            glVertex3f(self.block_size/2, 0, self.block_size/2)
-            glVertex3f(-self.block_size/2, 0, self.block_size/2)
-            
-            # Front face
-            glNormal3f(0.0, 0.0, 1.0)
-            glVertex3f(-self.block_size/2, 0, self.block_size/2)
-            glVertex3f(self.block_size/2, 0, self.block_size/2)
-            glVertex3f(self.block_size/2, self.block_height, self.block_size/2)
-            glVertex3f(-self.block_size/2, self.block_height, self.block_size/2)
-            
-            # Back face
-            glNormal3f(0.0, 0.0, -1.0)
-            glVertex3f(-self.block_size/2, 0, -self.block_size/2)
-            glVertex3f(-self.block_size/2, self.block_height, -self.block_size/2)
-            glVertex3f(self.block_size/2, self.block_height, -self.block_size/2)
-            glVertex3f(self.block_size/2, 0, -self.block_size/2)
-            
-            # Right face
-            glNormal3f(1.0, 0.0, 0.0)
-            glVertex3f(self.block_size/2, 0, -self.block_size/2)
-            glVertex3f(self.block_size/2, self.block_height, -self.block_size/2)
-            glVertex3f(self.block_size/2, self.block_height, self.block_size/2)
-            glVertex3f(self.block_size/2, 0, self.block_size/2)
-            
-            # Left face
-            glNormal3f(-1.0, 0.0, 0.0)
-            glVertex3f(-self.block_size/2, 0, -self.block_size/2)
-            glVertex3f(-self.block_size/2, 0, self.block_size/2)
-            glVertex3f(-self.block_size/2, self.block_height, self.block_size/2)
-            glVertex3f(-self.block_size/2, self.block_height, -self.block_size/2)
-            glEnd()
-            
-            glPopMatrix()
-
-        self.render_parking_space()
-    
     def get_block_positions(self):
         """Return list of block positions and colors"""
         return self.blocks 
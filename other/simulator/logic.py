@@ -43,30 +43,15 @@ def main_test_loop():
             if elapsed > duration:
                 if last_action in ("left", "right"):
                     robot_controller.center_steering()
-                    try:
-                        import control as real_control
-                        real_control.steer_left.last_direction = 'center'
-                    except Exception:
-                        pass
                 action_idx = (action_idx + 1) % len(ACTIONS)
                 action_start_time = time.time()
                 action, duration = ACTIONS[action_idx]
             if action == "forward":
                 robot_controller.center_steering()
-                try:
-                    import control as real_control
-                    real_control.steer_left.last_direction = 'center'
-                except Exception:
-                    pass
                 robot_controller.move_forward(50)
                 last_action = "forward"
             elif action == "backward":
                 robot_controller.center_steering()
-                try:
-                    import control as real_control
-                    real_control.steer_left.last_direction = 'center'
-                except Exception:
-                    pass
                 robot_controller.move_backward(50)
                 last_action = "backward"
             elif action == "left":
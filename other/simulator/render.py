@@ -0,0 +1,406 @@
+import math
+import numpy as np
+from OpenGL.GL import *
+
+from assets import CAR_SCALE, CAR_STL, asset_path, load_mesh
+from robot import CAMERA_FORWARD, CAMERA_FOV, CAMERA_HEIGHT, CAMERA_TILT
+
+# OpenGL drawing for the headless simulation core (robot.Robot, field.Field).
+# Only the Viewer creates these, so kinematics and scoring run without a display.
+
+CAR_STL_PATH = asset_path(CAR_STL)
+
+def box_quads(center_x, center_z, width, depth, height):
+    """Emit the six GL_QUADS faces of a box (call between glBegin(GL_QUADS) and glEnd)."""
+    x1 = center_x - width / 2
+    x2 = center_x + width / 2
+    z1 = center_z - depth / 2
+    z2 = center_z + depth / 2
+    y1 = 0.0
+    y2 = height
+    # Bottom face
+    glNormal3f(0.0, -1.0, 0.0)
+    glVertex3f(x1, y1, z1)
+    glVertex3f(x2, y1, z1)
+    glVertex3f(x2, y1, z2)
+    glVertex3f(x1, y1, z2)
+    # Top face
+    glNormal3f(0.0, 1.0, 0.0)
+    glVertex3f(x1, y2, z1)
+    glVertex3f(x1, y2, z2)
+    glVertex3f(x2, y2, z2)
+    glVertex3f(x2, y2, z1)
+    # Front face
+    glNormal3f(0.0, 0.0, 1.0)
+    glVertex3f(x1, y1, z2)
+    glVertex3f(x2, y1, z2)
+    glVertex3f(x2, y2, z2)
+    glVertex3f(x1, y2, z2)
+    # Back face
+    glNormal3f(0.0, 0.0, -1.0)
+    glVertex3f(x1, y1, z1)
+    glVertex3f(x1, y2, z1)
+    glVertex3f(x2, y2, z1)
+    glVertex3f(x2, y1, z1)
+    # Left face
+    glNormal3f(-1.0, 0.0, 0.0)
+    glVertex3f(x1, y1, z1)
+    glVertex3f(x1, y1, z2)
+    glVertex3f(x1, y2, z2)
+    glVertex3f(x1, y2, z1)
+    # Right face
+    glNormal3f(1.0, 0.0, 0.0)
+    glVertex3f(x2, y1, z1)
+    glVertex3f(x2, y2, z1)
+    glVertex3f(x2, y2, z2)
+    glVertex3f(x2, y1, z2)
+
+
+def draw_box(center_x, center_z, width, depth, height):
+    """Draw a box centered at (center_x, center_z) with given dimensions."""
+    glBegin(GL_QUADS)
+    box_quads(center_x, center_z, width, depth, height)
+    glEnd()
+
+
+class RobotRenderer:
+    """
+    Draws a robot.Robot: the car.stl mesh, its axes and the camera FOV.
+    The mesh normals and interleaved vertex array come from assets.load_mesh
+    (built once, then cached on disk); the first render uploads them to a
+    vertex buffer (VBO) and every frame draws the car with one glDrawArrays.
+    Contexts without buffer objects get a display list compiled from the same
+    array instead.
+    """
+    def __init__(self, robot, stl_path=CAR_STL_PATH):
+        self.robot = robot
+        # Load the STL file (preprocessed and cached by the asset manager)
+        self.mesh = load_mesh(stl_path)
+        self.vertices = self.mesh.vertices
+        self.vertex_count = len(self.vertices)
+        self.vbo = None
+        self.display_list = None
+
+    def _upload_mesh(self):
+        """Create the VBO (or, on legacy contexts, the display list) for the mesh. Needs a GL context."""
+        try:
+            if not bool(glGenBuffers):
+                raise RuntimeError("vertex buffer objects not supported")
+            self.vbo = glGenBuffers(1)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+            glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_STATIC_DRAW)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+        except Exception:
+            self.vbo = None
+            self.display_list = glGenLists(1)
+            glNewList(self.display_list, GL_COMPILE)
+            self._draw_arrays(self.vertices)
+            glEndList()
+
+    def _draw_arrays(self, pointer):
+        glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+        glInterleavedArrays(GL_N3F_V3F, 0, pointer)
+        glDrawArrays(GL_TRIANGLES, 0, self.vertex_count)
+        glPopClientAttrib()
+
+    def draw_mesh(self):
+        if self.vbo is None and self.display_list is None:
+            self._upload_mesh()
+        if self.vbo is not None:
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+            self._draw_arrays(None)  # offset 0 into the bound buffer
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+        else:
+            glCallList(self.display_list)
+
+    def release(self):
+        """Free the vertex buffer or display list (needs the GL context)."""
+        if self.vbo is not None:
+            glDeleteBuffers(1, [self.vbo])
+            self.vbo = None
+        if self.display_list is not None:
+            glDeleteLists(self.display_list, 1)
+            self.display_list = None
+
+    def render(self):
+        """Render the robot model"""
+        # Set material properties for blue color
+        glColor3f(0.0, 0.0, 1.0)  # Pure blue color
+        glMaterialfv(GL_FRONT_AND_BACK, GL_AMBIENT, [0.0, 0.0, 0.4, 1.0])  # Dark blue ambient
+        glMaterialfv(GL_FRONT_AND_BACK, GL_DIFFUSE, [0.0, 0.0, 0.8, 1.0])  # Medium blue diffuse
+        glMaterialfv(GL_FRONT_AND_BACK, GL_SPECULAR, [0.4, 0.4, 1.0, 1.0])  # Light blue specular
+        glMaterialf(GL_FRONT_AND_BACK, GL_SHININESS, 32.0)  # Slightly more shiny
+        
+        # --- Draw Robot Local Axes (before model transformations) ---
+        # Small axes (length 0.1) to show robot orientation
+        self.draw_axes(length=0.1)
+        # --- End Robot Axes ---
+
+        # --- Render the Mesh (with isolated transformations) ---
+        glPushMatrix() # Isolate model transformations
+        try:
+            # Apply initial rotation to lay the model flat
+            glRotatef(-90, 1, 0, 0)  # Rotate -90 degrees around X axis to lay flat
+            
+            # Scale the model to appropriate size (assuming STL is in mm)
+            glScalef(CAR_SCALE, CAR_SCALE, CAR_SCALE)  # Doubled from original 0.001
+            
+            # Render the mesh (one draw call, see draw_mesh)
+            self.draw_mesh()
+        finally:
+             glPopMatrix() # Restore state after model transformations
+        # --- End Mesh Rendering ---
+        
+        # Render camera visualization (now in correct robot local frame)
+        self.render_camera_visualization()
+        
+    def render_camera_visualization(self):
+        """Render camera direction arrow and field of view to match CameraSim"""
+        # --- Match CameraSim parameters ---
+        camera_height = CAMERA_HEIGHT
+        camera_forward = CAMERA_FORWARD
+        camera_tilt = CAMERA_TILT    # Same tilt as CameraSim (but tilt is ignored below for visualization)
+        
+        # FOV parameters 
+        fov = CAMERA_FOV
+        view_distance = 0.8 
+        arrow_length = 0.15
+        # --- End Parameters ---
+        
+        glPushAttrib(GL_LIGHTING_BIT | GL_LINE_BIT | GL_ENABLE_BIT)
+        glDisable(GL_LIGHTING) # Disable lighting for visualization primitives
+        glPushMatrix()
+
+        # 1. Translate to the camera's position relative to the robot origin.
+        #    Robot model Z points forward, Y points up. Camera is 0.3 up.
+        glTranslatef(0.0, camera_height, 0.0)
+
+        # 2. Apply the camera tilt rotation around the robot's X-axis.
+        # --- REMOVED this line to make visualization point horizontally forward ---
+        # glRotatef(camera_tilt, 1, 0, 0) 
+        # --- 
+        
+        # --- Draw Camera Local Axes --- 
+        # Draw axes here to show the camera's coordinate system (now horizontal)
+        self.draw_axes(length=0.05) # Smaller axes for camera
+        # --- End Camera Axes ---
+
+        # The current local +Z axis now represents the camera's viewing direction.
+        # We will draw the arrow and FOV cone along this axis.
+
+        # --- Draw Red Direction Arrow --- 
+        glColor3f(1.0, 0.0, 0.0) # Red
+        glLineWidth(3.0)
+        glBegin(GL_LINES)
+        glVertex3f(0, 0, 0) # Start at camera position (after translation & rotation)
+        glVertex3f(0, 0, arrow_length) # Extend along the local Z-axis (viewing direction)
+        glEnd()
+        
+        # Arrow head (simple triangle pointing along +Z)
+        head_length = 0.05
+        head_width = 0.02
+        glBegin(GL_TRIANGLES)
+        glVertex3f(0, 0, arrow_length) # Tip
+        glVertex3f(-head_width, 0, arrow_length - head_length) # Base left
+        glVertex3f(head_width, 0, arrow_length - head_length) # Base right
+        glEnd()
+        # --- End Arrow ---
+        
+        # --- Draw FOV Visualization (Yellow, Semi-transparent) ---
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        
+        # Calculate FOV corners at view_distance along the local Z axis
+        half_fov_rad = math.radians(fov / 2)
+        corner_x = view_distance * math.tan(half_fov_rad)
+        corner_z = view_distance
+        
+        glColor4f(1.0, 1.0, 0.0, 0.3)  # Yellow with alpha
+        glLineWidth(1.0) 
+        
+        # Draw FOV polygon representing the base of the pyramid
+        glBegin(GL_TRIANGLE_FAN) 
+        glVertex3f(0, 0, 0) # Apex (camera position)
+        glVertex3f(-corner_x, 0, corner_z) # Far left 
+        glVertex3f(corner_x, 0, corner_z)  # Far right
+        # Add intermediate points for a smoother cone base if desired
+        # For simplicity, a triangle fan base is used here
+        glEnd()
+
+        # Draw lines outlining the FOV pyramid
+        glLineWidth(1.5) 
+        glColor4f(1.0, 1.0, 0.0, 0.5) # Slightly less transparent outline
+        glBegin(GL_LINES)
+        glVertex3f(0, 0, 0)
+        glVertex3f(-corner_x, 0, corner_z)
+        
+        glVertex3f(0, 0, 0)
+        glVertex3f(corner_x, 0, corner_z)
+
+        # Line connecting the base corners
+        glVertex3f(-corner_x, 0, corner_z)
+        glVertex3f(corner_x, 0, corner_z)
+        glEnd()
+        # --- End FOV ---
+        
+        glPopMatrix()
+        glPopAttrib() # Restores lighting state etc.
+        
+    # Helper method to draw axes (copied from Viewer)
+    def draw_axes(self, length=1.0):
+        """Draw X (red), Y (green), Z (blue) axes"""
+        glPushAttrib(GL_LINE_BIT | GL_ENABLE_BIT)
+        # Assuming lighting is already disabled by caller if needed
+        glLineWidth(2.0)
+        glBegin(GL_LINES)
+        # X Axis (Red)
+        glColor3f(1.0, 0.0, 0.0)
+        glVertex3f(0.0, 0.0, 0.0)
+        glVertex3f(length, 0.0, 0.0)
+        # Y Axis (Green)
+        glColor3f(0.0, 1.0, 0.0)
+        glVertex3f(0.0, 0.0, 0.0)
+        glVertex3f(0.0, length, 0.0)
+        # Z Axis (Blue)
+        glColor3f(0.0, 0.0, 1.0)
+        glVertex3f(0.0, 0.0, 0.0)
+        glVertex3f(0.0, 0.0, length)
+        glEnd()
+        glPopAttrib()
+
+
+# Block colour and (ambient, diffuse) material by Field block colour name
+BLOCK_MATERIALS = {
+    'red': ((238/255, 39/255, 55/255), [0.2, 0.0, 0.0, 1.0], [238/255, 39/255, 55/255, 1.0]),  # RGB (238, 39, 55)
+    'green': ((68/255, 214/255, 44/255), [0.0, 0.2, 0.0, 1.0], [68/255, 214/255, 44/255, 1.0]),  # RGB (68, 214, 44)
+}
+
+
+class FieldRenderer:
+    """
+    Draws a field.Field: walls, blocks, parking space, origin marker and robot trajectory.
+    Everything except the trajectory is static, so it is compiled once into a
+    display list (blocks grouped by material, one glBegin per group) and each
+    frame is a single glCallList. The list is rebuilt only when the block layout
+    or the parking walls change.
+    """
+    def __init__(self, field):
+        self.field = field
+        self.scene_list = None
+        self.scene_key = None
+
+    def render_walls(self):
+        """Render the black walls for both inner (0.8x0.8m) and outer (3x3m) areas as solid cuboids."""
+        glColor3f(0.0, 0.0, 0.0)  # Black color
+        glMaterialfv(GL_FRONT, GL_AMBIENT, [0.1, 0.1, 0.1, 1.0])
+        glMaterialfv(GL_FRONT, GL_DIFFUSE, [0.2, 0.2, 0.2, 1.0])
+        glMaterialfv(GL_FRONT, GL_SPECULAR, [0.1, 0.1, 0.1, 1.0])
+        glMaterialf(GL_FRONT, GL_SHININESS, 10.0)
+        glBegin(GL_QUADS)
+        for box in self.field.wall_boxes():
+            box_quads(*box)
+        glEnd()
+
+    def render_parking_space(self):
+        """Render the magenta parking space walls as two vertical cuboids, spaced by 2.4x robot length."""
+        boxes = self.field.parking_wall_boxes()
+        if not boxes:
+            return
+        glColor3f(1.0, 0.0, 1.0)  # Magenta
+        glMaterialfv(GL_FRONT, GL_AMBIENT, [0.2, 0.0, 0.2, 1.0])
+        glMaterialfv(GL_FRONT, GL_DIFFUSE, [1.0, 0.0, 1.0, 1.0])
+        glMaterialfv(GL_FRONT, GL_SPECULAR, [0.2, 0.2, 0.2, 1.0])
+        glMaterialf(GL_FRONT, GL_SHININESS, 30.0)
+        glBegin(GL_QUADS)
+        for box in boxes:
+            box_quads(*box)
+        glEnd()
+
+    def render_origin(self):
+        """Mark the origin (0,0) with a yellow circle for reference."""
+        glPushMatrix()
+        glTranslatef(0.0, 0.01, 0.0)  # Slightly above ground to avoid z-fighting
+        glColor3f(1.0, 1.0, 0.0)
+        glBegin(GL_LINE_LOOP)
+        num_segments = 64
+        radius = 0.12
+        for i in range(num_segments):
+            theta = 2.0 * np.pi * i / num_segments
+            x = radius * np.cos(theta)
+            z = radius * np.sin(theta)
+            glVertex3f(x, 0, z)
+        glEnd()
+        glPopMatrix()
+
+    def render_blocks(self):
+        """Render the blocks, setting each material once for all blocks of that colour."""
+        block_size = self.field.block_size
+        block_height = self.field.block_height
+        for color, (rgb, ambient, diffuse) in BLOCK_MATERIALS.items():
+            positions = [pos for pos, c in self.field.blocks if c == color]
+            if not positions:
+                continue
+            glColor3f(*rgb)
+            glMaterialfv(GL_FRONT, GL_AMBIENT, ambient)
+            glMaterialfv(GL_FRONT, GL_DIFFUSE, diffuse)
+            glMaterialfv(GL_FRONT, GL_SPECULAR, [0.2, 0.2, 0.2, 1.0])
+            glMaterialf(GL_FRONT, GL_SHININESS, 30.0)
+            glBegin(GL_QUADS)
+            for x, z in positions:
+                box_quads(x, z, block_size, block_size, block_height)  # Directly on the ground
+            glEnd()
+
+    def current_scene_key(self):
+        # The parking walls only depend on the robot (its length), so no geometry is queried per frame
+        return tuple(self.field.blocks), self.field.robot
+
+    def build_scene(self, key):
+        """(Re)compile the static scene display list."""
+        if self.scene_list is None:
+            self.scene_list = glGenLists(1)
+        glNewList(self.scene_list, GL_COMPILE)
+        self.render_walls()
+        self.render_origin()
+        self.render_blocks()
+        self.render_parking_space()
+        glEndList()
+        self.scene_key = key
+
+    def render_trajectory(self):
+        robot = self.field.robot
+        if not (robot and robot.trajectory):
+            return
+        glPushAttrib(GL_LINE_BIT | GL_ENABLE_BIT)
+        glDisable(GL_LIGHTING)
+        glLineWidth(4.0)  # Thicker line
+        glColor3f(0.0, 0.8, 0.0)  # Green color
+        # The (x, z) points go straight to GL as 2D vertices (x, y); this maps y to
+        # world z, slightly above ground to avoid z-fighting
+        glPushMatrix()
+        glTranslatef(0.0, 0.02, 0.0)
+        glRotatef(90, 1, 0, 0)
+        glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(2, GL_DOUBLE, 0, robot.trajectory.points)
+        glDrawArrays(GL_LINE_STRIP, 0, len(robot.trajectory))
+        glPopClientAttrib()
+        glPopMatrix()
+        glPopAttrib()
+
+    def render(self, draw_trajectory=True):
+        """Render walls, blocks, parking space and origin marker (cached), then the robot trajectory."""
+        key = self.current_scene_key()
+        if key != self.scene_key:
+            self.build_scene(key)
+        glCallList(self.scene_list)
+
+        # Render robot trajectory if available and allowed
+        if draw_trajectory:
+            self.render_trajectory()
+
+    def release(self):
+        """Free the display list (needs the GL context)."""
+        if self.scene_list is not None:
+            glDeleteLists(self.scene_list, 1)
+            self.scene_list = None
+            self.scene_key = None
@@ -0,0 +1,293 @@
+"""
+Scenario sweep over randomized fields, run headless across all CPU cores.
+
+Every scenario is a block layout seed plus one combination of robot and
+controller parameters. Scenarios are grouped into chunks; each worker process
+simulates a chunk as one VecEnv batch with a simple pose-following lap
+controller and returns per-scenario metrics:
+    completed, laps, finish_time, lap_time, wall_contacts, block_contacts, distance
+Results are streamed chunk by chunk to a columnar Parquet file (pyarrow) or,
+when pyarrow is not installed, to CSV. Finished scenarios are cached by a hash
+of seed and parameters, so a rerun only simulates what changed.
+
+Usage:
+    python sweep.py --seeds 1000 --speed 0.6,0.8 --kp 1.5,2.5 --output sweep.parquet
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
+
+from field import Field
+from vec_env import VecEnv, RED
+
+# Optional: pyarrow for Parquet (columnar) output
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Bump when the simulation or the controller changes: invalidates cached results
+SWEEP_VERSION = 1
+
+# Default value of every swept parameter
+DEFAULT_PARAMS = {
+    'speed': 0.6,          # forward input, fraction of max_speed
+    'max_speed': 1.0,      # m/s (Robot.max_speed)
+    'turn_rate': 90.0,     # deg/s at full turn input (Robot.turn_rate)
+    'kp': 2.0,             # turn input per radian of heading error
+    'lookahead': 0.35,     # m along the lane to the steering target
+    'block_offset': 0.12,  # m beside a block when passing it
+    'direction': 1,        # 1 counter-clockwise, -1 clockwise
+}
+
+LANE_HALF_SIZE = 0.95  # half side of the square lane between inner and outer walls
+BLOCK_LOOKAHEAD = 0.5  # m ahead where blocks start to be avoided
+START_POSITION = (1.0, 0.0)  # on the right side of the field, as Robot
+
+METRIC_COLUMNS = ['completed', 'laps', 'finish_time', 'lap_time', 'wall_contacts', 'block_contacts', 'distance']
+
+
+def scenario_key(seed, params, laps, max_time, dt):
+    """Cache key: hash of everything that determines a scenario's result."""
+    payload = json.dumps({'seed': seed, 'params': params, 'laps': laps, 'max_time': max_time,
+                          'dt': dt, 'version': SWEEP_VERSION}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def lane_target(x, z, direction, half, lookahead):
+    """Point `lookahead` metres further along the square lane from the projection of (x, z)."""
+    perimeter = 8 * half
+    on_x_side = np.abs(x) >= np.abs(z)
+    zc = np.clip(z, -half, half)
+    xc = np.clip(x, -half, half)
+    # Arc length, counter-clockwise from the corner (half, -half)
+    s = np.where(on_x_side,
+                 np.where(x >= 0, zc + half, 5 * half - zc),
+                 np.where(z >= 0, 3 * half - xc, 7 * half + xc))
+    s = np.mod(s + direction * lookahead, perimeter)
+    side = np.floor(s / (2 * half))
+    u = s - side * 2 * half - half  # -half..half along the side
+    tx = np.choose(side.astype(np.int64) % 4, [np.full_like(u, half), -u, np.full_like(u, -half), u])
+    tz = np.choose(side.astype(np.int64) % 4, [u, np.full_like(u, half), -u, np.full_like(u, -half)])
+    return tx, tz
+
+
+def lap_controller(obs, params):
+    """
+    Batch controller: follow the square lane, passing red blocks on the right
+    and green blocks on the left. Returns (N, 2) actions (forward, turn).
+    """
+    x, z = obs['position'][:, 0], obs['position'][:, 1]
+    heading_rad = np.radians(obs['heading'])
+    sin_h, cos_h = np.sin(heading_rad), np.cos(heading_rad)
+
+    tx, tz = lane_target(x, z, params['direction'], LANE_HALF_SIZE, params['lookahead'])
+    # Target in the robot frame (lateral positive to the right, forward)
+    rel_x, rel_z = tx - x, tz - z
+    target_lat = rel_x * cos_h - rel_z * sin_h
+    target_fwd = rel_x * sin_h + rel_z * cos_h
+
+    # Nearest block ahead: aim beside it instead
+    blocks = obs['blocks']
+    block_lat, block_fwd = blocks[:, :, 0], blocks[:, :, 1]
+    ahead = obs['block_mask'] & (block_fwd > 0) & (block_fwd < BLOCK_LOOKAHEAD) & (np.abs(block_lat) < 0.3)
+    dist = np.where(ahead, block_fwd, np.inf)
+    nearest = np.argmin(dist, axis=1)
+    rows = np.arange(len(x))
+    has_block = np.isfinite(dist[rows, nearest])
+    side = np.where(obs['block_color'][rows, nearest] == RED, 1.0, -1.0)
+    avoid_lat = block_lat[rows, nearest] + side * params['block_offset']
+    target_lat = np.where(has_block, avoid_lat, target_lat)
+    target_fwd = np.where(has_block, block_fwd[rows, nearest], target_fwd)
+
+    error = np.arctan2(target_lat, target_fwd)  # positive: target to the right
+    turn = np.clip(-params['kp'] * error, -1.0, 1.0)  # negative turn input turns right
+    return np.stack((params['speed'], turn), axis=1)
+
+
+def run_chunk(task):
+    """Simulate a chunk of scenarios as one VecEnv batch. Returns [(key, metrics), ...]."""
+    scenarios, laps, max_time, dt = task
+    n = len(scenarios)
+    fields = [Field(random.Random(seed)) for _, seed, _ in scenarios]
+    env = VecEnv(n, dt=dt, fields=fields, stop_on_contact=False)
+    params = {name: np.array([p[name] for _, _, p in scenarios], dtype=np.float64) for name in DEFAULT_PARAMS}
+    env.set_parameters(max_speed=params['max_speed'], turn_rate=params['turn_rate'])
+    env.start_x, env.start_z = START_POSITION
+    obs = env.reset()
+    # Start along the lane in the driving direction
+    env.heading[:] = np.where(params['direction'] > 0, 0.0, 180.0)
+    obs = env.observe()
+
+    progress = np.zeros(n)  # signed angle travelled around the field centre (degrees)
+    last_angle = np.degrees(np.arctan2(env.x, env.z))
+    finish_time = np.full(n, np.nan)
+    distance = np.zeros(n)
+    for step in range(int(max_time / dt)):
+        if env.done.all():
+            break
+        obs, rewards, dones, infos = env.step(lap_controller(obs, params))
+        distance += rewards
+        angle = np.degrees(np.arctan2(env.x, env.z))
+        progress += (angle - last_angle + 180.0) % 360.0 - 180.0
+        last_angle = angle
+        # The lane runs clockwise in the atan2(x, z) angle when driving counter-clockwise
+        finished = ~env.done & (-params['direction'] * progress >= laps * 360.0)
+        finish_time[finished] = (step + 1) * dt
+        env.done |= finished
+
+    results = []
+    for i, (key, seed, p) in enumerate(scenarios):
+        completed = bool(np.isfinite(finish_time[i]))
+        results.append((key, {
+            'completed': completed,
+            'laps': round(float(-p['direction'] * progress[i] / 360.0), 3),
+            'finish_time': float(finish_time[i]) if completed else None,
+            'lap_time': float(finish_time[i] / laps) if completed else None,
+            'wall_contacts': int(env.wall_contacts[i]),
+            'block_contacts': int(env.block_contacts[i]),
+            'distance': round(float(distance[i]), 4),
+        }))
+    return results
+
+
+class ResultWriter:
+    """Streams result rows to Parquet (one row group per batch) or CSV."""
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.parquet = path.endswith('.parquet')
+        if self.parquet and pq is None:
+            self.path = os.path.splitext(path)[0] + '.csv'
+            self.parquet = False
+            print(f"pyarrow not installed, writing CSV to {self.path}")
+        self._writer = None
+        self._file = None
+        self.rows = 0
+
+    def write(self, rows):
+        if not rows:
+            return
+        if self.parquet:
+            table = pa.table({c: [row[c] for row in rows] for c in self.columns})
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            if self._file is None:
+                self._file = open(self.path, 'w', newline='')
+                self._writer = csv.DictWriter(self._file, fieldnames=self.columns)
+                self._writer.writeheader()
+            self._writer.writerows(rows)
+            self._file.flush()
+        self.rows += len(rows)
+
+    def close(self):
+        if self.parquet and self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def load_cache(path):
+    cache = {}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # partially written last line of an interrupted run
+                cache[entry['key']] = entry['metrics']
+    return cache
+
+
+def build_scenarios(seeds, grid, laps, max_time, dt):
+    """All (key, seed, params) combinations of the seeds and the parameter grid."""
+    names = list(DEFAULT_PARAMS)
+    scenarios = []
+    for values in itertools.product(*(grid.get(name, [DEFAULT_PARAMS[name]]) for name in names)):
+        params = dict(zip(names, values))
+        for seed in seeds:
+            scenarios.append((scenario_key(seed, params, laps, max_time, dt), seed, params))
+    return scenarios
+
+
+def run_sweep(scenarios, output, laps=3, max_time=180.0, dt=1/30.0, workers=None, chunk_size=64,
+              cache_path=None):
+    columns = ['key', 'seed'] + list(DEFAULT_PARAMS) + METRIC_COLUMNS
+    cache = load_cache(cache_path)
+    writer = ResultWriter(output, columns)
+    by_key = {key: (seed, params) for key, seed, params in scenarios}
+
+    def rows_for(items):
+        return [dict(key=key, seed=by_key[key][0], **by_key[key][1], **metrics) for key, metrics in items]
+
+    cached = [(key, cache[key]) for key in by_key if key in cache]
+    todo = [s for s in scenarios if s[0] not in cache]
+    writer.write(rows_for(cached))
+    print(f"{len(scenarios)} scenarios: {len(cached)} cached, {len(todo)} to run")
+
+    tasks = [(todo[i:i + chunk_size], laps, max_time, dt) for i in range(0, len(todo), chunk_size)]
+    start = time.perf_counter()
+    cache_file = open(cache_path, 'a') if cache_path else None
+    try:
+        with multiprocessing.Pool(workers) as pool:
+            done = 0
+            for results in pool.imap_unordered(run_chunk, tasks):
+                writer.write(rows_for(results))
+                if cache_file:
+                    for key, metrics in results:
+                        cache_file.write(json.dumps({'key': key, 'metrics': metrics}) + '\n')
+                    cache_file.flush()
+                done += len(results)
+                elapsed = time.perf_counter() - start
+                print(f"  {done}/{len(todo)} scenarios, {done / elapsed:.1f}/s")
+    finally:
+        writer.close()
+        if cache_file:
+            cache_file.close()
+    print(f"Wrote {writer.rows} rows to {writer.path}")
+    return writer.path
+
+
+def parse_list(text, cast=float):
+    return [cast(v) for v in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a scenario sweep over randomized fields.")
+    parser.add_argument('--seeds', type=int, default=100, help="number of block layouts (seeds)")
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--laps', type=int, default=3)
+    parser.add_argument('--max-time', type=float, default=180.0, help="simulated seconds per scenario")
+    parser.add_argument('--dt', type=float, default=1/30.0)
+    parser.add_argument('--workers', type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument('--chunk', type=int, default=64, help="scenarios per worker batch")
+    parser.add_argument('--output', default='sweep_results.parquet')
+    parser.add_argument('--cache', default='sweep_cache.jsonl', help="result cache ('' to disable)")
+    for name, value in DEFAULT_PARAMS.items():
+        parser.add_argument('--' + name.replace('_', '-'), dest=name, default=None,
+                            help=f"comma-separated values (default {value})")
+    args = parser.parse_args()
+
+    grid = {name: parse_list(getattr(args, name), int if name == 'direction' else float)
+            for name in DEFAULT_PARAMS if getattr(args, name) is not None}
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    scenarios = build_scenarios(seeds, grid, args.laps, args.max_time, args.dt)
+    run_sweep(scenarios, args.output, laps=args.laps, max_time=args.max_time, dt=args.dt,
+              workers=args.workers, chunk_size=args.chunk, cache_path=args.cache or None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import numpy as np
+
+TRAJECTORY_CAPACITY = 4096  # points kept per robot
+TRAJECTORY_SPACING = 0.1  # minimum distance between recorded points (meters)
+
+
+def douglas_peucker(points, tolerance):
+    """
+    Boolean mask of the points kept by Douglas-Peucker simplification of the
+    polyline `points` (N, 2): every dropped point is within `tolerance` of the
+    simplified line. The first and last points are always kept.
+    """
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = points[first], points[last]
+        segment = end - start
+        length = np.hypot(segment[0], segment[1])
+        inner = points[first + 1:last] - start
+        if length > 1e-12:
+            distances = np.abs(segment[0] * inner[:, 1] - segment[1] * inner[:, 0]) / length
+        else:
+            distances = np.hypot(inner[:, 0], inner[:, 1])
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance:
+            split = first + 1 + i
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return keep
+
+
+class TrajectoryBuffer:
+    """
+    Bounded trajectory store: the robot's (x, z) path in a preallocated NumPy ring buffer.
+    Every point is written twice (at i and i + capacity), so the stored points
+    are always one contiguous block: `points` is a zero-copy (N, 2) view that can
+    be handed to analytics or to glVertexPointer as is.
+    When the buffer is full the oldest points are dropped, or, with a
+    decimate_tolerance, the older half is first simplified with Douglas-Peucker
+    so long runs keep their overall shape.
+    """
+    def __init__(self, capacity=TRAJECTORY_CAPACITY, spacing=TRAJECTORY_SPACING, decimate_tolerance=None):
+        self.capacity = capacity
+        self.spacing = spacing
+        self.decimate_tolerance = decimate_tolerance
+        self._data = np.empty((2 * capacity, 2))
+        self._start = 0  # index of the oldest point in the first copy
+        self._count = 0
+        self._last = None  # last point as Python floats: the spacing check skips NumPy
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return (tuple(p) for p in self.points.tolist())
+
+    @property
+    def points(self):
+        """The stored points, oldest first, as an (N, 2) view (valid until the next append)."""
+        return self._data[self._start:self._start + self._count]
+
+    @property
+    def last(self):
+        return self._last
+
+    def append(self, x, z):
+        """Record (x, z) if it is at least `spacing` from the last recorded point. Returns True if stored."""
+        if self._last is not None:
+            lx, lz = self._last
+            if (x - lx) ** 2 + (z - lz) ** 2 < self.spacing ** 2:
+                return False
+        if self._count == self.capacity:
+            self._make_room()
+        # Slot i and its mirror i + capacity always hold the same point, so the
+        # window [start, start + count) never needs to wrap
+        i = (self._start + self._count) % self.capacity
+        self._data[i] = self._data[i + self.capacity] = (x, z)
+        self._count += 1
+        self._last = (x, z)
+        return True
+
+    def _make_room(self):
+        if self.decimate_tolerance is None:
+            self._start = (self._start + 1) % self.capacity
+            self._count -= 1
+            return
+        points = self.points
+        half = self._count // 2
+        older = points[:half + 1]  # include the first newer point so the joint is kept
+        kept = older[douglas_peucker(older, self.decimate_tolerance)][:-1]
+        compacted = np.concatenate((kept, points[half:]))
+        # Always free at least a quarter of the buffer so compaction stays amortised O(1)
+        compacted = compacted[max(0, len(compacted) - (self.capacity - self.capacity // 4)):]
+        self._reset(compacted)
+
+    def _reset(self, points):
+        n = len(points)
+        self._data[:n] = points
+        self._data[self.capacity:self.capacity + n] = points
+        self._start = 0
+        self._count = n
+
+    def clear(self):
+        self._start = 0
+        self._count = 0
+        self._last = None
@@ -0,0 +1,179 @@
+import random
+import numpy as np
+
+from field import Field
+from robot import Robot
+
+RED = 0
+GREEN = 1
+COLOR_CODES = {'red': RED, 'green': GREEN}
+MAX_BLOCKS = 6
+
+
+class VecEnv:
+    """
+    N robots simulated together, each on its own Field block layout.
+    State is kept as structure-of-arrays (one NumPy array per quantity) and
+    step() advances the whole batch with the same kinematics as Robot.update.
+    API in the style of Gym vector environments:
+        obs = env.reset()
+        obs, rewards, dones, infos = env.step(actions)   # actions: (N, 2) forward, turn in [-1, 1]
+    A robot that touches a wall or block is done and stays frozen until reset(indices)
+    (with stop_on_contact=False it keeps driving; contacts are counted either way).
+    The reward is the distance driven during the step.
+    """
+    def __init__(self, num_envs, seed=None, dt=1/30.0, fields=None, stop_on_contact=True):
+        self.num_envs = num_envs
+        self.dt = dt
+        self.stop_on_contact = stop_on_contact
+        self.rng = random.Random(seed)
+        template = Robot()
+        self.robot_radius = template.get_length_x() / 2  # robot footprint as a circle
+
+        # --- Robot state ---
+        self.x = np.zeros(num_envs)
+        self.z = np.zeros(num_envs)
+        self.heading = np.zeros(num_envs)  # yaw in degrees, as Robot.rotation[1]
+        self.speed = np.zeros(num_envs)
+        self.done = np.zeros(num_envs, dtype=bool)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.wall_contacts = np.zeros(num_envs, dtype=np.int64)  # number of separate touches
+        self.block_contacts = np.zeros(num_envs, dtype=np.int64)
+        self._touching_wall = np.zeros(num_envs, dtype=bool)
+        self._touching_block = np.zeros(num_envs, dtype=bool)
+        self.start_x = template.position[0]
+        self.start_z = template.position[2]
+        self.start_heading = template.rotation[1]
+
+        # --- Robot parameters (see Robot.set_parameters) ---
+        self.max_speed = np.full(num_envs, template.max_speed)
+        self.max_turn_angle = np.full(num_envs, template.max_turn_angle)
+        self.acceleration = np.full(num_envs, template.acceleration)
+        self.turn_rate = np.full(num_envs, template.turn_rate)
+
+        # --- Field layouts: blocks padded to MAX_BLOCKS per robot ---
+        self.block_xz = np.zeros((num_envs, MAX_BLOCKS, 2))
+        self.block_color = np.zeros((num_envs, MAX_BLOCKS), dtype=np.int8)
+        self.block_mask = np.zeros((num_envs, MAX_BLOCKS), dtype=bool)
+        self.fields = [None] * num_envs
+        for i in range(num_envs):
+            self.set_field(i, fields[i] if fields is not None else Field(self.rng))
+        self.block_half = self.fields[0].block_size / 2
+
+        # Walls are the same for every robot: (xmin, xmax, zmin, zmax) boxes
+        reference = self.fields[0]
+        reference.set_robot(template)
+        boxes = reference.wall_boxes() + reference.parking_wall_boxes()
+        self.walls = np.array([(cx - w / 2, cx + w / 2, cz - d / 2, cz + d / 2) for cx, cz, w, d, h in boxes])
+        reference.set_robot(None)
+
+        self.reset()
+
+    def set_field(self, i, field):
+        """Pair robot i with a Field (its block layout is copied into the batch arrays)."""
+        self.fields[i] = field
+        self.block_mask[i] = False
+        for j, ((bx, bz), color) in enumerate(field.blocks[:MAX_BLOCKS]):
+            self.block_xz[i, j] = (bx, bz)
+            self.block_color[i, j] = COLOR_CODES[color]
+            self.block_mask[i, j] = True
+
+    def set_parameters(self, indices=None, max_speed=None, max_turn_angle=None,
+                       acceleration=None, turn_rate=None):
+        """Per-robot Robot.set_parameters; values may be scalars or arrays matching indices."""
+        idx = slice(None) if indices is None else indices
+        if max_speed is not None:
+            self.max_speed[idx] = max_speed
+        if max_turn_angle is not None:
+            self.max_turn_angle[idx] = max_turn_angle
+        if acceleration is not None:
+            self.acceleration[idx] = acceleration
+        if turn_rate is not None:
+            self.turn_rate[idx] = turn_rate
+
+    def reset(self, indices=None, new_layouts=False):
+        """Put robots back at the start pose (optionally with freshly generated block layouts)."""
+        idx = np.arange(self.num_envs) if indices is None else np.asarray(indices)
+        if new_layouts:
+            for i in idx:
+                self.fields[i].generate_random_blocks(self.rng)
+                self.set_field(i, self.fields[i])
+        self.x[idx] = self.start_x
+        self.z[idx] = self.start_z
+        self.heading[idx] = self.start_heading
+        self.speed[idx] = 0.0
+        self.done[idx] = False
+        self.steps[idx] = 0
+        self.wall_contacts[idx] = 0
+        self.block_contacts[idx] = 0
+        self._touching_wall[idx] = False
+        self._touching_block[idx] = False
+        return self.observe()
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.float64)
+        forward_input = actions[:, 0]
+        turn_input = actions[:, 1]
+        active = ~self.done
+        dt = self.dt
+
+        # Speed: accelerate toward the target speed (Robot.update)
+        target_speed = forward_input * self.max_speed
+        speed_diff = target_speed - self.speed
+        max_change = self.acceleration * dt
+        speed = np.where(np.abs(speed_diff) > max_change, self.speed + max_change * np.sign(speed_diff), target_speed)
+        speed = np.where(active, speed, self.speed)
+
+        # Position uses the heading before this step's turn, as Robot.update does
+        heading_rad = np.radians(self.heading)
+        dx = speed * np.sin(heading_rad) * dt
+        dz = speed * np.cos(heading_rad) * dt
+        self.x += np.where(active, dx, 0.0)
+        self.z += np.where(active, dz, 0.0)
+        self.heading += np.where(active, -turn_input * self.turn_rate * dt, 0.0)
+        self.speed = speed
+        self.steps += active
+
+        wall_contact, block_contact = self.contacts()
+        wall_contact &= active
+        block_contact &= active
+        self.wall_contacts += wall_contact & ~self._touching_wall
+        self.block_contacts += block_contact & ~self._touching_block
+        self._touching_wall = wall_contact
+        self._touching_block = block_contact
+        if self.stop_on_contact:
+            self.done |= wall_contact | block_contact
+        rewards = np.where(active, np.abs(speed) * dt, 0.0)
+        infos = {'wall_contact': wall_contact, 'block_contact': block_contact}
+        return self.observe(), rewards, self.done.copy(), infos
+
+    def contacts(self):
+        """(wall_contact, block_contact) boolean arrays: footprint circle overlapping a wall or block."""
+        px = self.x[:, None]
+        pz = self.z[:, None]
+        w = self.walls
+        dx = np.maximum(np.maximum(w[:, 0] - px, px - w[:, 1]), 0.0)
+        dz = np.maximum(np.maximum(w[:, 2] - pz, pz - w[:, 3]), 0.0)
+        wall_contact = (dx * dx + dz * dz < self.robot_radius ** 2).any(axis=1)
+        bx = np.maximum(np.abs(self.block_xz[:, :, 0] - px) - self.block_half, 0.0)
+        bz = np.maximum(np.abs(self.block_xz[:, :, 1] - pz) - self.block_half, 0.0)
+        block_contact = ((bx * bx + bz * bz < self.robot_radius ** 2) & self.block_mask).any(axis=1)
+        return wall_contact, block_contact
+
+    def observe(self):
+        """Batch observation: pose, speed and every block in the robot frame (x lateral, z forward)."""
+        heading_rad = np.radians(self.heading)
+        sin_h = np.sin(heading_rad)[:, None]
+        cos_h = np.cos(heading_rad)[:, None]
+        rel_x = self.block_xz[:, :, 0] - self.x[:, None]
+        rel_z = self.block_xz[:, :, 1] - self.z[:, None]
+        blocks_local = np.stack((rel_x * cos_h - rel_z * sin_h, rel_x * sin_h + rel_z * cos_h), axis=-1)
+        return {
+            'position': np.stack((self.x, self.z), axis=1),
+            'heading': self.heading.copy(),
+            'speed': self.speed.copy(),
+            'blocks': blocks_local,
+            'block_color': self.block_color,
+            'block_mask': self.block_mask,
+            'done': self.done.copy(),
+        }
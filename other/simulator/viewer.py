@@ -2,9 +2,10 @@ import pygame
 from pygame.locals import *
 from OpenGL.GL import *
 from OpenGL.GLU import *
-import numpy as np
-from PIL import Image
 import math
+from assets import load_texture
+from render import RobotRenderer, FieldRenderer
+from field import MAT_HALF_SIZE, MAT_TEXTURE
 
 class Viewer:
     def __init__(self, width=800, height=600):
@@ -44,7 +45,23 @@ class Viewer:
         self.setup_camera()
         
         # Load ground texture
-        self.ground_texture = self.load_texture("Screenshot_1.jpg")
+        self.ground_texture = self.load_texture(MAT_TEXTURE)
+
+        # Renderers are attached to the headless Robot/Field the first time they are drawn
+        self.robot_renderer = None
+        self.field_renderer = None
+
+    def renderers_for(self, robot, field):
+        """RobotRenderer/FieldRenderer for these objects (rebuilt only if the objects change)."""
+        if self.robot_renderer is None or self.robot_renderer.robot is not robot:
+            if self.robot_renderer is not None:
+                self.robot_renderer.release()  # its vertex buffer
+            self.robot_renderer = RobotRenderer(robot)
+        if field is not None and (self.field_renderer is None or self.field_renderer.field is not field):
+            if self.field_renderer is not None:
+                self.field_renderer.release()  # its cached display list
+            self.field_renderer = FieldRenderer(field)
+        return self.robot_renderer, self.field_renderer if field is not None else None
         
     def setup_camera(self):
         """Set up the camera projection"""
@@ -54,30 +71,30 @@ class Viewer:
         glMatrixMode(GL_MODELVIEW)
         
     def load_texture(self, image_path):
-        img = Image.open(image_path)
-        img = img.convert('RGB')
-        img_width = img.size[0]
-        img_height = img.size[1]
-        img_data = np.array(img.getdata(), np.uint8)
+        # RGB mip-map chain from the asset manager (decoded once, then memory-mapped from its cache)
+        levels = load_texture(image_path)
         
         texture = glGenTextures(1)
         glBindTexture(GL_TEXTURE_2D, texture)
-        
-        # Specify the texture
-        glTexImage2D(
-            GL_TEXTURE_2D,
-            0,
-            GL_RGB,
-            img_width,
-            img_height,
-            0,
-            GL_RGB,
-            GL_UNSIGNED_BYTE,
-            img_data
-        )
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)  # RGB rows of odd-sized levels are not 4-byte aligned
+        
+        # Specify the texture, one image per mip level
+        for level, img_data in enumerate(levels):
+            img_height, img_width = img_data.shape[:2]
+            glTexImage2D(
+                GL_TEXTURE_2D,
+                level,
+                GL_RGB,
+                img_width,
+                img_height,
+                0,
+                GL_RGB,
+                GL_UNSIGNED_BYTE,
+                img_data
+            )
         
         # Set texture parameters
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP)
@@ -137,10 +154,11 @@ class Viewer:
         # Draw 3.2x3.2 meter ground plane
         glBegin(GL_QUADS)
         glNormal3f(0, 1, 0)  # Normal pointing up
-        glTexCoord2f(0.0, 0.0); glVertex3f(-1.6, 0.0, -1.6)  # Bottom-left
-        glTexCoord2f(1.0, 0.0); glVertex3f(1.6, 0.0, -1.6)   # Bottom-right
-        glTexCoord2f(1.0, 1.0); glVertex3f(1.6, 0.0, 1.6)    # Top-right
-        glTexCoord2f(0.0, 1.0); glVertex3f(-1.6, 0.0, 1.6)   # Top-left
+        m = MAT_HALF_SIZE
+        glTexCoord2f(0.0, 0.0); glVertex3f(-m, 0.0, -m)  # Bottom-left
+        glTexCoord2f(1.0, 0.0); glVertex3f(m, 0.0, -m)   # Bottom-right
+        glTexCoord2f(1.0, 1.0); glVertex3f(m, 0.0, m)    # Top-right
+        glTexCoord2f(0.0, 1.0); glVertex3f(-m, 0.0, m)   # Top-left
         glEnd()
         
         glDisable(GL_TEXTURE_2D)
@@ -189,9 +207,11 @@ class Viewer:
         # Draw the ground
         self.draw_ground()
         
+        robot_renderer, field_renderer = self.renderers_for(robot, field)
+
         # Render the field and blocks if available
-        if field is not None:
-            field.render()
+        if field_renderer is not None:
+            field_renderer.render()
         
         # Update robot position and rotation
         glPushMatrix()
@@ -201,7 +221,7 @@ class Viewer:
         glRotatef(robot_rotation[2], 0, 0, 1)  # Roll
         
         # Render the robot
-        robot.render()
+        robot_renderer.render()
         
         glPopMatrix()
         
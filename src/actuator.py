@@ -0,0 +1,157 @@
+import collections
+import threading
+import time
+
+import control
+import events
+from events import NULL_LOG
+from pipeline import LatestSlot
+from steering import ProportionalSteering, SteeringEstimator, STEER_CONTROL_PERIOD
+
+# Stop the drive motor if no new command arrives for this long (seconds)
+STALE_COMMAND_TIMEOUT = 0.25
+
+
+class ActuatorController:
+    """
+    Applies actuator commands (rpi.make_command dicts) on a dedicated output thread.
+    submit() only drops the command into a newest-wins mailbox. The output thread
+    keeps the commanded steering/speed and calls the motor functions only when
+    one of them changes, so repeated commands cost no GPIO writes. If no command
+    arrives for stale_timeout seconds the drive motor is stopped (watchdog).
+    If a motor call raises, the thread stores it in `error`, stops the drive
+    motor and exits; callers should check `error` and stop submitting.
+    Every transition is kept as (time, field, old, new, label) in `transitions`.
+    With proportional=True the command's continuous 'steer' sets a target wheel
+    angle instead, and every STEER_CONTROL_PERIOD the steering motor duty is
+    updated to drive the open-loop angle estimate toward it.
+    """
+    def __init__(self, motors=control, log=NULL_LOG, stale_timeout=STALE_COMMAND_TIMEOUT, history=256,
+                 proportional=False):
+        self.motors = motors
+        self.log = log
+        self.stale_timeout = stale_timeout
+        self.mailbox = LatestSlot()
+        self.steering = None  # None until the first command: forces the first write
+        self.speed = None
+        self.last_command_time = None
+        self.watchdog_stops = 0
+        self.transitions = collections.deque(maxlen=history)
+        self.proportional = proportional
+        self.estimator = SteeringEstimator()
+        self.steering_control = ProportionalSteering()
+        self.target_angle = 0.0
+        self.steer_drive = None  # (direction, duty) last written in proportional mode
+        self.error = None
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self.last_command_time = time.perf_counter()
+        self._thread = threading.Thread(target=self._output_loop, name='actuator', daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, command):
+        self.mailbox.put(command)
+
+    def _set_speed(self, speed, label, now):
+        if speed == self.speed:
+            return
+        if speed == 0:
+            self.motors.stop_drive_motor()
+        else:
+            self.motors.move_forward(speed)
+        self.transitions.append((now, 'speed', self.speed, speed, label))
+        self.speed = speed
+
+    def _set_steering(self, steering, label, now):
+        if steering == self.steering:
+            return
+        if steering == 'left':
+            self.motors.steer_left()
+        elif steering == 'right':
+            self.motors.steer_right()
+        else:
+            self.motors.center_steering()
+        self.transitions.append((now, 'steering', self.steering, steering, label))
+        self.steering = steering
+
+    def _update_steering(self, now, label=None):
+        """Proportional mode: one controller step toward target_angle."""
+        angle = self.estimator.update(now)
+        drive = self.steering_control.drive(self.target_angle, angle)
+        if drive == self.steer_drive:
+            return
+        direction, duty = drive
+        if direction < 0:
+            self.motors.steer_left(duty)
+        elif direction > 0:
+            self.motors.steer_right(duty)
+        else:
+            self.motors.center_steering()
+        self.estimator.set_drive(direction, duty, now)
+        self.transitions.append((now, 'steering', self.steer_drive, drive, label))
+        self.steer_drive = drive
+
+    def apply(self, command, now=None):
+        """Bring the motors to `command`, writing only what changed."""
+        if now is None:
+            now = time.perf_counter()
+        # Same order as before: stop first, then steer, then drive
+        if command['speed'] == 0:
+            self._set_speed(0, command['label'], now)
+        if self.proportional:
+            self.target_angle = self.steering_control.target_angle(command['steer'])
+            self._update_steering(now, command['label'])
+        else:
+            self._set_steering(command['steering'], command['label'], now)
+        if command['speed'] > 0:
+            self._set_speed(command['speed'], command['label'], now)
+        self.last_command_time = now
+        self.log.log(events.EV_ACTION, command['label'], key=command['label'])
+
+    def _check_watchdog(self, now):
+        if self.speed and now - self.last_command_time > self.stale_timeout:
+            self._set_speed(0, 'WATCHDOG: stale command', now)
+            self.watchdog_stops += 1
+            self.log.log(events.EV_WATCHDOG_STOP, now - self.last_command_time)
+
+    def _output_loop(self):
+        poll = STEER_CONTROL_PERIOD if self.proportional else self.stale_timeout / 4
+        try:
+            while self._running:
+                command = self.mailbox.get(poll)
+                if command is not None:
+                    self.apply(command)
+                else:
+                    now = time.perf_counter()
+                    if self.proportional:
+                        self._update_steering(now)
+                    self._check_watchdog(now)
+        except Exception as e:
+            self.error = e
+            self._running = False
+            self._stop_after_error()
+
+    def _stop_after_error(self):
+        """The watchdog dies with the output thread, so stop the drive motor now (never raises)."""
+        try:
+            self.motors.stop_drive_motor()
+        except Exception:
+            return
+        self.transitions.append((time.perf_counter(), 'speed', self.speed, 0, 'ERROR'))
+        self.speed = 0
+
+    def stop(self):
+        """Stop the output thread and leave the drive motor stopped."""
+        self._running = False
+        self.mailbox.close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.error is None:
+            self._set_speed(0, 'SHUTDOWN', time.perf_counter())
+        elif self.speed != 0:
+            self._stop_after_error()  # the stop after the error failed: retry once more
@@ -0,0 +1,159 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+import rpi
+from color_lut import ColorClassifier
+from vision import detect_blocks, detect_corners, detect_wall_and_angle
+
+PHOTOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'v-photos')
+DEFAULT_SIZES = ((640, 480), (320, 240))
+
+
+def load_corpus(photos_dir, sizes):
+    """Load every photo once and resize it to each runtime resolution."""
+    paths = sorted(glob.glob(os.path.join(photos_dir, '*.jpg')))
+    if not paths:
+        raise FileNotFoundError(f"No .jpg photos in {photos_dir}")
+    originals = [cv2.imread(p) for p in paths]
+    return {size: [cv2.resize(img, size, interpolation=cv2.INTER_AREA) for img in originals] for size in sizes}
+
+
+def make_cases(size, classifier=None):
+    """Benchmarked functions: each detector alone and the full per-frame path of rpi.main."""
+    zone = rpi.make_trigger_zone(*size)
+    def frame(img):
+        rpi.process_frame(img, zone, classifier)
+    return {
+        'detect_blocks': detect_blocks,
+        'detect_corners': lambda img: detect_corners(img, draw_overlay=False),
+        'detect_wall_and_angle': detect_wall_and_angle,
+        'process_frame': frame,
+    }
+
+
+def time_case(fn, images, warmup, iterations):
+    """Per-call latencies in ms; every call gets a fresh copy of the frame (copy not timed)."""
+    for i in range(warmup):
+        fn(images[i % len(images)].copy())
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        img = images[i % len(images)].copy()
+        t0 = time.perf_counter_ns()
+        fn(img)
+        samples[i] = (time.perf_counter_ns() - t0) / 1e6
+    return samples
+
+
+def peak_memory_kb(fn, images):
+    """Peak traced allocation (NumPy buffers included) over one pass of the corpus."""
+    copies = [img.copy() for img in images]
+    tracemalloc.start()
+    for img in copies:
+        fn(img)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def run(photos_dir, sizes, warmup, iterations, use_lut=False):
+    corpus = load_corpus(photos_dir, sizes)
+    classifier = ColorClassifier() if use_lut else None
+    results = {}
+    for size in sizes:
+        key = f"{size[0]}x{size[1]}"
+        results[key] = {}
+        for name, fn in make_cases(size, classifier).items():
+            samples = time_case(fn, corpus[size], warmup, iterations)
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            results[key][name] = {
+                'p50_ms': round(float(p50), 4),
+                'p95_ms': round(float(p95), 4),
+                'p99_ms': round(float(p99), 4),
+                'fps': round(1000.0 / float(np.mean(samples)), 1),
+                'peak_kb': round(peak_memory_kb(fn, corpus[size]), 1),
+            }
+    return {
+        'meta': {
+            'machine': platform.machine(),
+            'python': platform.python_version(),
+            'opencv': cv2.__version__,
+            'numpy': np.__version__,
+            'lut': use_lut,
+            'warmup': warmup,
+            'iterations': iterations,
+            'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold, metric='p50_ms'):
+    """List of (size, function, baseline, current) where metric regressed by more than threshold."""
+    regressions = []
+    for size, cases in current['results'].items():
+        for name, stats in cases.items():
+            base = baseline.get('results', {}).get(size, {}).get(name)
+            if base is None:
+                continue
+            if stats[metric] > base[metric] * (1 + threshold):
+                regressions.append((size, name, base[metric], stats[metric]))
+    return regressions
+
+
+def print_report(report):
+    print(f"{'size':<9} {'function':<22} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'fps':>8} {'peak KB':>9}")
+    for size, cases in report['results'].items():
+        for name, s in cases.items():
+            print(f"{size:<9} {name:<22} {s['p50_ms']:>8.2f} {s['p95_ms']:>8.2f} {s['p99_ms']:>8.2f} {s['fps']:>8.1f} {s['peak_kb']:>9.1f}")
+    print(f"max RSS: {report['meta']['max_rss_kb']} KB")
+
+
+def parse_size(text):
+    w, h = text.lower().split('x')
+    return int(w), int(h)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vision detectors on the v-photos corpus.")
+    parser.add_argument('--photos', default=PHOTOS_DIR, help="directory of field photos")
+    parser.add_argument('--sizes', default=','.join(f"{w}x{h}" for w, h in DEFAULT_SIZES),
+                        help="comma-separated runtime resolutions, e.g. 640x480,320x240")
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--lut', action='store_true', help="run process_frame with the lookup-table classifier")
+    parser.add_argument('--output', default='benchmark_results.json', help="where to write the JSON report")
+    parser.add_argument('--baseline', help="JSON report to compare against")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="fail if p50 is slower than the baseline by more than this fraction")
+    args = parser.parse_args()
+
+    sizes = [parse_size(s) for s in args.sizes.split(',')]
+    report = run(args.photos, sizes, args.warmup, args.iterations, args.lut)
+    print_report(report)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"[INFO] Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for size, name, base, cur in regressions:
+            print(f"[FAIL] {size} {name}: p50 {base:.2f} ms -> {cur:.2f} ms (+{(cur / base - 1) * 100:.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print(f"[INFO] No regressions beyond {args.threshold * 100:.0f}% against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import hashlib
+import os
+
+import cv2
+import numpy as np
+
+from vision import MASK_RANGES, WALL_BLACK_THRESHOLD, WALL_MASK
+
+# Default location of cached lookup tables (next to this file)
+LUT_CACHE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class ColorClassifier:
+    """
+    Single-pass colour classification through a quantized BGR lookup table.
+    Every named mask in vision.MASK_RANGES plus the black wall gets one bit, and
+    the table maps each quantized BGR colour to the OR of the bits it falls in
+    (the ranges overlap, so one pixel can carry several classes).
+    classify() turns a BGR frame into that label image in one gather.
+    Colours are classified at the centre of their quantization cell, so pixels
+    within half a cell of a range boundary may land on the other side of it.
+    The default 7 bits (2 MB table) is the coarsest that made the same decisions
+    as the HSV path on the v-photos frames; 5 bits (32 KB, uint16 indexes) turned
+    an avoid-red into go-straight, and 6 bits flipped a wall turn.
+    """
+    def __init__(self, bits=7, cache_dir=LUT_CACHE_DIR):
+        if not 1 <= bits <= 8:
+            raise ValueError(f"bits must be between 1 and 8, got {bits}")
+        self.bits = bits
+        self.shift = 8 - bits
+        self.class_names = list(MASK_RANGES) + [WALL_MASK]
+        if len(self.class_names) > 8:
+            raise ValueError("ColorClassifier supports at most 8 classes")
+        self.class_bits = {name: 1 << i for i, name in enumerate(self.class_names)}
+        self.path = None
+        if cache_dir is not None:
+            self.path = os.path.join(cache_dir, f"color_lut_{bits}_{self.thresholds_key()}.npy")
+        self.lut = self._load_or_build()
+
+    def thresholds_key(self):
+        """Short hash of the thresholds and quantization the table is built from."""
+        h = hashlib.sha1()
+        h.update(f"bits={self.bits};wall={WALL_BLACK_THRESHOLD};".encode())
+        for name, ranges in MASK_RANGES.items():
+            h.update(name.encode())
+            for lower, upper in ranges:
+                h.update(np.asarray(lower, dtype=np.int64).tobytes())
+                h.update(np.asarray(upper, dtype=np.int64).tobytes())
+        return h.hexdigest()[:12]
+
+    def _load_or_build(self):
+        if self.path is not None and os.path.exists(self.path):
+            lut = np.load(self.path)
+            if lut.shape == (1 << (3 * self.bits),) and lut.dtype == np.uint8:
+                return lut
+        lut = self.build()
+        if self.path is not None:
+            try:
+                np.save(self.path, lut)
+            except OSError as e:
+                print(f"Warning: could not cache colour LUT at {self.path}: {e}")
+        return lut
+
+    def build(self):
+        """Evaluate every class at the centre of every quantized BGR cell."""
+        levels = np.arange(1 << self.bits, dtype=np.uint16) << self.shift
+        if self.shift:
+            levels += 1 << (self.shift - 1)
+        b, g, r = np.meshgrid(levels, levels, levels, indexing='ij')
+        bgr = np.stack((b, g, r), axis=-1).astype(np.uint8).reshape(-1, 1, 3)
+        hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
+        gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        lut = np.zeros(bgr.shape[0], dtype=np.uint8)
+        for name, ranges in MASK_RANGES.items():
+            hit = np.zeros(bgr.shape[0], dtype=bool)
+            for lower, upper in ranges:
+                hit |= cv2.inRange(hsv, lower, upper).ravel() > 0
+            lut[hit] |= self.class_bits[name]
+        lut[gray.ravel() <= WALL_BLACK_THRESHOLD] |= self.class_bits[WALL_MASK]
+        return lut
+
+    def classify(self, image_bgr):
+        """Label image (uint8, one bit per class) for a BGR image."""
+        index_type = np.uint16 if self.bits <= 5 else np.uint32
+        q = image_bgr >> self.shift if self.shift else image_bgr
+        idx = q[..., 0].astype(index_type) << (2 * self.bits)
+        idx |= q[..., 1].astype(index_type) << self.bits
+        idx |= q[..., 2]
+        return np.take(self.lut, idx)
+
+    def mask(self, labels, name):
+        """0/255 mask of one class from a label image."""
+        return cv2.compare(cv2.bitwise_and(labels, self.class_bits[name]), 0, cv2.CMP_NE)
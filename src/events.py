@@ -0,0 +1,169 @@
+import collections
+import sys
+import threading
+import time
+
+# Message catalogue: code -> (tag, template). Callers only pass a code and its
+# raw arguments; the text is built by the writer thread (or str() of a Reason).
+
+# --- Steering reasons (control_logic / process_frame) ---
+REASON_WALL_CLOSE_RIGHT = 1
+REASON_WALL_CLOSE_LEFT = 2
+REASON_WALL_CLOSE_ZERO = 3
+REASON_WALL_CLOSE_NO_ANGLE = 4
+REASON_AVOID_GREEN = 5
+REASON_AVOID_RED = 6
+REASON_CORNER_ORANGE_LEFT = 7
+REASON_CORNER_ORANGE_RIGHT = 8
+REASON_CORNER_BLUE_LEFT = 9
+REASON_CORNER_BLUE_RIGHT = 10
+REASON_DEFAULT = 11
+REASON_WALL_OVERRIDE = 12
+REASON_WALL_TIME_OVERRIDE = 13
+
+# --- Log events ---
+EV_ACTION = 32
+EV_OVERRIDE_END_LEFT = 33
+EV_OVERRIDE_END_RIGHT = 34
+EV_OVERRIDE_TRIGGER_LEFT = 35
+EV_OVERRIDE_TRIGGER_RIGHT = 36
+EV_OVERRIDE_ACTIVE = 37
+EV_TIME_OVERRIDE_ACTIVE = 38
+EV_TIME_OVERRIDE_PHASE2 = 39
+EV_TIME_OVERRIDE_END = 40
+EV_TIME_OVERRIDE_TRIGGER_LEFT = 41
+EV_TIME_OVERRIDE_TRIGGER_RIGHT = 42
+EV_WATCHDOG_STOP = 43
+
+MESSAGES = {
+    REASON_WALL_CLOSE_RIGHT: ('REASON', 'Wall close, wall_angle={:.2f} > 0, steer right to increase angle'),
+    REASON_WALL_CLOSE_LEFT: ('REASON', 'Wall close, wall_angle={:.2f} < 0, steer left to decrease angle'),
+    REASON_WALL_CLOSE_ZERO: ('REASON', 'Wall close, wall_angle=0, steer left for safety'),
+    REASON_WALL_CLOSE_NO_ANGLE: ('REASON', 'Wall close, always steer left for safety'),
+    REASON_AVOID_GREEN: ('REASON', 'Avoid green: steer left (gentle, capped)'),
+    REASON_AVOID_RED: ('REASON', 'Avoid red: steer right (gentle, capped)'),
+    REASON_CORNER_ORANGE_LEFT: ('REASON', 'Corner: any orange line point (thick) inside parabola with negative angle, turn left (CCW)'),
+    REASON_CORNER_ORANGE_RIGHT: ('REASON', 'Corner: any orange line point (thick) inside parabola with positive angle, turn right (CW)'),
+    REASON_CORNER_BLUE_LEFT: ('REASON', 'Corner: any blue line point (thick) inside parabola with negative angle, turn left (CCW)'),
+    REASON_CORNER_BLUE_RIGHT: ('REASON', 'Corner: any blue line point (thick) inside parabola with positive angle, turn right (CW)'),
+    REASON_DEFAULT: ('REASON', 'Default: go straight'),
+    REASON_WALL_OVERRIDE: ('REASON', 'Wall angle override'),
+    REASON_WALL_TIME_OVERRIDE: ('REASON', 'Wall angle time override'),
+    EV_ACTION: ('ACTION', '{}'),
+    EV_OVERRIDE_END_LEFT: ('DEBUG', 'WALL ANGLE OVERRIDE END: wall_angle={:.2f} >= 5, stop steering left'),
+    EV_OVERRIDE_END_RIGHT: ('DEBUG', 'WALL ANGLE OVERRIDE END: wall_angle={:.2f} <= -5, stop steering right'),
+    EV_OVERRIDE_TRIGGER_LEFT: ('DEBUG', 'WALL ANGLE OVERRIDE TRIGGERED: wall_angle={:.2f} < 0, steer left until >= 5'),
+    EV_OVERRIDE_TRIGGER_RIGHT: ('DEBUG', 'WALL ANGLE OVERRIDE TRIGGERED: wall_angle={:.2f} > 0, steer right until <= -5'),
+    EV_OVERRIDE_ACTIVE: ('DEBUG', 'WALL ANGLE OVERRIDE ACTIVE: steer {} (wall_angle={:.2f})'),
+    EV_TIME_OVERRIDE_ACTIVE: ('DEBUG', 'WALL ANGLE TIME OVERRIDE ACTIVE: steer {} (timer {:.2f}s left, phase={})'),
+    EV_TIME_OVERRIDE_PHASE2: ('DEBUG', 'WALL ANGLE TIME OVERRIDE PHASE 2: steer {} for 1s'),
+    EV_TIME_OVERRIDE_END: ('DEBUG', 'WALL ANGLE TIME OVERRIDE END'),
+    EV_TIME_OVERRIDE_TRIGGER_LEFT: ('DEBUG', 'WALL ANGLE TIME OVERRIDE TRIGGERED: wall_angle={:.2f} < 0, steer left for 2s then right for 1s'),
+    EV_TIME_OVERRIDE_TRIGGER_RIGHT: ('DEBUG', 'WALL ANGLE TIME OVERRIDE TRIGGERED: wall_angle={:.2f} > 0, steer right for 2s then left for 1s'),
+    EV_WATCHDOG_STOP: ('WARN', 'No actuator command for {:.2f}s, drive motor stopped'),
+}
+
+
+def format_message(code, args):
+    return MESSAGES[code][1].format(*args)
+
+
+class Reason(collections.namedtuple('Reason', ('code', 'args'))):
+    """Steering reason: a message code and its arguments, turned into text only by str()."""
+    __slots__ = ()
+
+    def __str__(self):
+        return format_message(self.code, self.args)
+
+
+class EventLog:
+    """
+    Asynchronous event log. log() timestamps (code, args) and appends it to a
+    deque (append/popleft are atomic, no lock taken); a background thread
+    formats the records and writes them line-buffered to a file or stdout.
+    Each message key (the code unless given) is emitted at most once per
+    min_interval seconds; suppressed repeats are counted on the next line.
+    """
+    def __init__(self, path=None, min_interval=0.0, max_queue=4096, poll_interval=0.02):
+        self.path = path
+        self.min_interval_ns = int(min_interval * 1e9)
+        self.max_queue = max_queue
+        self.poll_interval = poll_interval
+        self.dropped = 0
+        self.written = 0
+        self._queue = collections.deque()
+        self._last = {}
+        self._suppressed = {}
+        self._t0 = time.perf_counter_ns()
+        self._running = False
+        self._thread = None
+
+    def log(self, code, *args, key=None):
+        now = time.perf_counter_ns()
+        if key is None:
+            key = code
+        if self.min_interval_ns:
+            last = self._last.get(key)
+            if last is not None and now - last < self.min_interval_ns:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return
+            self._last[key] = now
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._queue.append((now, code, args, self._suppressed.pop(key, 0)))
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._writer_loop, name='event-log', daemon=True)
+        self._thread.start()
+        return self
+
+    def format_record(self, record):
+        t, code, args, suppressed = record
+        tag, template = MESSAGES[code]
+        line = f"{(t - self._t0) / 1e9:9.3f} [{tag}] {template.format(*args)}"
+        if suppressed:
+            line += f" (+{suppressed} suppressed)"
+        return line
+
+    def _writer_loop(self):
+        out = open(self.path, 'a', buffering=1) if self.path else sys.stdout
+        try:
+            while True:
+                running = self._running
+                while self._queue:
+                    out.write(self.format_record(self._queue.popleft()) + '\n')
+                    self.written += 1
+                if not running:
+                    break
+                time.sleep(self.poll_interval)
+            out.flush()
+        finally:
+            if self.path:
+                out.close()
+
+    def stop(self):
+        """Write everything still queued and stop the writer thread."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class NullEventLog:
+    """Drop-in EventLog that discards everything (offline replay and benchmarks)."""
+    dropped = 0
+    written = 0
+
+    def log(self, code, *args, key=None):
+        pass
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+
+NULL_LOG = NullEventLog()
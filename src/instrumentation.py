@@ -0,0 +1,120 @@
+import json
+import time
+
+import numpy as np
+
+# Stages of one control-loop iteration, in the order they normally run
+LOOP_STAGES = ('capture', 'wall', 'corners', 'blocks', 'overlay', 'control', 'actuate', 'display')
+
+
+class FrameTimer:
+    """
+    Per-stage timing for the control loop.
+    mark(stage) charges the time since the previous mark (or begin_frame) to
+    that stage. Spans live in a preallocated ring buffer of the last `capacity`
+    frames, so nothing is allocated per frame; percentiles are only computed
+    for the periodic summary and the final report.
+    """
+    def __init__(self, stages=LOOP_STAGES, capacity=1024, budget_s=1/30.0, summary_every=300):
+        self.stages = tuple(stages)
+        self._index = {name: i for i, name in enumerate(self.stages)}
+        self.capacity = capacity
+        self.budget_ns = int(budget_s * 1e9)
+        self.summary_every = summary_every
+        self._spans = np.zeros((capacity, len(self.stages)), dtype=np.int64)
+        self._totals = np.zeros(capacity, dtype=np.int64)
+        self._starts = np.zeros(capacity, dtype=np.int64)
+        self._row = self._spans[0]
+        self._slot = 0
+        self.frames = 0
+        self.overruns = 0
+        self._first_start = None
+        self._frame_start = 0
+        self._last = 0
+
+    def begin_frame(self):
+        now = time.perf_counter_ns()
+        self._slot = self.frames % self.capacity
+        self._row = self._spans[self._slot]
+        self._row[:] = 0
+        self._starts[self._slot] = now
+        if self._first_start is None:
+            self._first_start = now
+        self._frame_start = now
+        self._last = now
+
+    def mark(self, stage):
+        now = time.perf_counter_ns()
+        self._row[self._index[stage]] += now - self._last
+        self._last = now
+
+    def end_frame(self):
+        total = self._last - self._frame_start
+        self._totals[self._slot] = total
+        self.frames += 1
+        if total > self.budget_ns:
+            self.overruns += 1
+        if self.summary_every and self.frames % self.summary_every == 0:
+            print(self.format_summary())
+
+    def _window(self):
+        n = min(self.frames, self.capacity)
+        return self._spans[:n], self._totals[:n], self._starts[:n]
+
+    def summary(self):
+        """Stage p50/p99 (ms), overrun count and achieved FPS over the buffered frames."""
+        spans, totals, starts = self._window()
+        if len(totals) == 0:
+            return {'frames': 0}
+        stage_stats = {}
+        for name, i in self._index.items():
+            p50, p99 = np.percentile(spans[:, i], [50, 99]) / 1e6
+            stage_stats[name] = {'p50_ms': round(float(p50), 3), 'p99_ms': round(float(p99), 3),
+                                 'mean_ms': round(float(spans[:, i].mean()) / 1e6, 3)}
+        p50, p99 = np.percentile(totals, [50, 99]) / 1e6
+        span_s = (starts.max() - starts.min()) / 1e9
+        return {
+            'frames': int(len(totals)),
+            'stages': stage_stats,
+            'total': {'p50_ms': round(float(p50), 3), 'p99_ms': round(float(p99), 3)},
+            'window_overruns': int(np.count_nonzero(totals > self.budget_ns)),
+            'fps': round((len(totals) - 1) / span_s, 1) if span_s > 0 else None,
+        }
+
+    def format_summary(self):
+        s = self.summary()
+        stages = ' '.join(f"{name}={st['p50_ms']:.1f}/{st['p99_ms']:.1f}" for name, st in s['stages'].items())
+        return (f"[TIMING] fps={s['fps']} total={s['total']['p50_ms']:.1f}/{s['total']['p99_ms']:.1f}ms "
+                f"overruns={self.overruns}/{self.frames} (p50/p99 ms) {stages}")
+
+    def report(self):
+        """End-of-run report: whole-run counters plus the summary of the buffered frames."""
+        elapsed_s = (time.perf_counter_ns() - self._first_start) / 1e9 if self._first_start else 0.0
+        return {
+            'frames': self.frames,
+            'overruns': self.overruns,
+            'budget_ms': self.budget_ns / 1e6,
+            'run_fps': round(self.frames / elapsed_s, 1) if elapsed_s > 0 else None,
+            'last_frames': self.summary(),
+        }
+
+    def write_report(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+
+class NullFrameTimer:
+    """Drop-in FrameTimer that records nothing (instrumentation disabled)."""
+    frames = 0
+
+    def begin_frame(self):
+        pass
+
+    def mark(self, stage):
+        pass
+
+    def end_frame(self):
+        pass
+
+
+NULL_TIMER = NullFrameTimer()
@@ -0,0 +1,85 @@
+import threading
+import time
+
+
+class LatestSlot:
+    """
+    Single-item mailbox where the newest item wins.
+    put() overwrites whatever has not been consumed yet; get() blocks until an
+    item newer than the last one it returned is available.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._seq = 0
+        self._read_seq = 0
+        self._closed = False
+        self.dropped = 0  # items overwritten before anyone read them
+
+    def put(self, item):
+        with self._cond:
+            if self._seq != self._read_seq:
+                self.dropped += 1
+            self._item = item
+            self._seq += 1
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """Return the newest unread item, or None on timeout or after close()."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq != self._read_seq or self._closed, timeout):
+                return None
+            if self._seq == self._read_seq:
+                return None
+            self._read_seq = self._seq
+            return self._item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class Pipeline:
+    """
+    Capture / vision pipeline.
+    A capture thread feeds frames into a latest-frame-wins slot and the caller's
+    thread runs the vision stage (so cv2.imshow keeps working). Commands go to
+    actuator.ActuatorController, which runs its own output thread.
+    """
+    def __init__(self, capture_fn, poll_timeout=0.5):
+        self.capture_fn = capture_fn
+        self.poll_timeout = poll_timeout
+        self.frames = LatestSlot()
+        self.stop_event = threading.Event()
+        self.error = None
+        self._thread = threading.Thread(target=self._capture_loop, name='capture')
+
+    def start(self):
+        self._thread.start()
+
+    def _capture_loop(self):
+        try:
+            while not self.stop_event.is_set():
+                frame = self.capture_fn()
+                self.frames.put((time.perf_counter(), frame))
+        except Exception as e:
+            self.error = e
+            self.stop_event.set()
+        finally:
+            self.frames.close()
+
+    def next_frame(self):
+        """Block until a new frame is captured. Returns (capture_time, frame) or None when stopping."""
+        while not self.stop_event.is_set():
+            item = self.frames.get(self.poll_timeout)
+            if item is not None:
+                return item
+        return None
+
+    def stop(self):
+        """Stop and join the capture thread. Safe to call more than once."""
+        self.stop_event.set()
+        self.frames.close()
+        if self._thread.is_alive():
+            self._thread.join()
@@ -0,0 +1,66 @@
+import argparse
+import time
+
+import rpi
+from color_lut import ColorClassifier
+from events import EventLog, NULL_LOG
+from session import Session, _to_jsonable
+
+# Fields compared between the recording and the replay
+DECISION_FIELDS = ('steer', 'reason', 'command')
+
+
+def replay(session, classifier=None, limit=None, quiet=True):
+    """
+    Push every recorded frame through the current vision.py and rpi.process_frame
+    as fast as possible. Returns (diffs, elapsed_seconds, frames) where diffs is
+    a list of (index, field, recorded, replayed).
+    """
+    zone = rpi.make_trigger_zone(session.width, session.height)
+    log = NULL_LOG if quiet else EventLog().start()
+    count = len(session) if limit is None else min(limit, len(session))
+    diffs = []
+    start = time.perf_counter()
+    for i in range(count):
+        frame_bgr = session.frame(i)
+        result = rpi.process_frame(frame_bgr, zone, classifier, log=log)
+        replayed = _to_jsonable({'steer': result.get('steer'), 'reason': result.get('steer_reason'),
+                                 'command': result.get('command')})
+        recorded = session.records[i]
+        for field in DECISION_FIELDS:
+            if recorded.get(field) != replayed[field]:
+                diffs.append((i, field, recorded.get(field), replayed[field]))
+    elapsed = time.perf_counter() - start
+    log.stop()
+    return diffs, elapsed, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded session through the current vision and control logic.")
+    parser.add_argument('session', help="session directory written by rpi.py (RECORD_SESSION)")
+    parser.add_argument('--limit', type=int, default=None, help="replay only the first N frames")
+    parser.add_argument('--lut', action='store_true', help="use the lookup-table colour classifier")
+    parser.add_argument('--show', type=int, default=20, help="number of decision diffs to print")
+    parser.add_argument('--verbose', action='store_true', help="keep process_frame's [DEBUG] output")
+    args = parser.parse_args()
+
+    session = Session(args.session)
+    if session.frame_mode == 'y':
+        print("[WARN] Session holds only the Y plane; colour detectors will see a gray image.")
+    elif session.frame_mode == 'jpeg':
+        print("[WARN] Session frames are JPEG; some decision diffs may come from compression artefacts.")
+    classifier = ColorClassifier() if args.lut else None
+    diffs, elapsed, count = replay(session, classifier, args.limit, quiet=not args.verbose)
+
+    changed_frames = len({d[0] for d in diffs})
+    fps = count / elapsed if elapsed > 0 else float('inf')
+    print(f"[INFO] Replayed {count} frames in {elapsed:.2f}s ({fps:.1f} FPS)")
+    print(f"[INFO] Decision changed on {changed_frames}/{count} frames")
+    for i, field, recorded, replayed in diffs[:args.show]:
+        print(f"  frame {i} {field}: recorded={recorded!r} replayed={replayed!r}")
+    if len(diffs) > args.show:
+        print(f"  ... {len(diffs) - args.show} more")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,107 +1,413 @@
+import math
 import time
 import cv2
 import numpy as np
 import control
-from vision import detect_blocks, detect_corners, detect_wall_and_angle
-from picamera2 import Picamera2
+from vision import FrameContext, detect_blocks_ctx, detect_corners_ctx, detect_wall_and_angle_ctx
+try:
+    from picamera2 import Picamera2
+except ImportError:
+    Picamera2 = None  # Offline use (replay, benchmarks): no camera available
+from pipeline import Pipeline
+from actuator import ActuatorController
+from color_lut import ColorClassifier
+from session import SessionRecorder
+from instrumentation import FrameTimer, NULL_TIMER
+import events
+from events import EventLog, NULL_LOG, Reason
 
 # --- Parameters ---
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
 DT = 1/30.0  # 30 FPS
 SHOW_CAMERA_FEED = False  # Set to True to display camera feed window
+PIPELINE_MODE = False  # Set to True to run capture, vision and actuation on separate threads
+PROPORTIONAL_STEERING = False  # True: steering motor PWM follows the continuous steer value (steering.py)
+MOTOR_BACKEND = None  # 'gpio' (RPi.GPIO), 'pigpio' (DMA-timed PWM, needs pigpiod), 'fake', or None (gpio if available)
+
+# --- COLOUR CLASSIFICATION ---
+# True: build every colour mask from one lookup-table pass (color_lut.py, table
+# cached on disk and rebuilt when vision.py thresholds change) instead of HSV
+# conversion plus one inRange per colour. Quantization moves pixels near the
+# threshold edges, so masks are close to, not identical with, the HSV ones.
+USE_COLOR_LUT = False
+
+# --- SESSION RECORDING (replay offline with replay.py) ---
+RECORD_SESSION = None  # Directory to record into, e.g. 'sessions/run1'; None disables
+RECORD_FRAME_MODE = 'bgr'  # 'bgr' (raw, lossless), 'jpeg' (smaller, lossy) or 'y' (luma only, colour detectors won't replay)
+
+# --- LOOP TIMING INSTRUMENTATION (instrumentation.py) ---
+TIMING_ENABLED = False  # Per-stage timing of every frame (capture, detectors, control, actuation)
+TIMING_SUMMARY_EVERY = 300  # Print stage p50/p99, overruns and FPS every N frames; 0 disables
+TIMING_REPORT = 'timing_report.json'  # Written at the end of the run; None disables
+
+# --- EVENT LOG ([ACTION]/[DEBUG] lines, written by a background thread, see events.py) ---
+LOG_FILE = None  # File to append log lines to; None writes them to stdout
+LOG_MIN_INTERVAL = 0.2  # Seconds between two lines of the same message ([ACTION] per label)
 
 # --- WALL ANGLE OVERRIDE RULE CONFIGURATION ---
 # Options: 'wall', 'time', 'none'
 WALL_ANGLE_OVERRIDE_RULE = 'none'  # Change to 'time' or 'none' as needed
 
+# --- CORNER TRIGGER ZONE CONFIGURATION ---
+# Minimum orange/blue line pixels inside the parabola zone that also count as a
+# line being inside it (in addition to the endpoint test). 0 disables.
+CORNER_ZONE_MIN_PIXELS = 0
+
 # --- Helper functions from main.py (parabola, etc.) ---
-def is_inside_parabola(x, y, h, k, a, threshold=0):
-    parabola_y = a * (x - h) ** 2 + k
-    return y > parabola_y + threshold
-
-def any_thick_line_point_inside_parabola(pt1, pt2, h, k, a, threshold=2, thickness=8, num_samples=20):
-    dx = pt2[0] - pt1[0]
-    dy = pt2[1] - pt1[1]
-    length = np.hypot(dx, dy)
+def _thick_line_corners(x1, y1, x2, y2, length, thickness):
+    half = thickness / 2
+    ox = -(y2 - y1) / length * half
+    oy = (x2 - x1) / length * half
+    return ((x1 + ox, y1 + oy), (x2 + ox, y2 + oy), (x2 - ox, y2 - oy), (x1 - ox, y1 - oy))
+
+def thick_line_inside_parabola(pt1, pt2, h, k, a, threshold=2, thickness=8):
+    """
+    True if any point of the thick line pt1-pt2 is below the parabola
+    y = a*(x-h)**2 + k + threshold (image y grows downward).
+    The thick line is the rectangle swept by the segment pt1-pt2 offset by
+    +-thickness/2 along its normal. g(x, y) = y - (a*(x-h)**2 + k + threshold)
+    is concave along every rectangle edge (for a >= 0), so its maximum over the
+    rectangle is at a corner or at the stationary point of an edge. The line is
+    inside the parabola region iff that maximum is > 0.
+    This replaces a check that sampled 21 points along the line and
+    thickness+1 across it; the two differed only where the region cuts into
+    the rectangle by less than that grid, where only this version reports True.
+    """
+    x1, y1 = float(pt1[0]), float(pt1[1])
+    x2, y2 = float(pt2[0]), float(pt2[1])
+    c = k + threshold
+    length = math.hypot(x2 - x1, y2 - y1)
     if length == 0:
-        return is_inside_parabola(pt1[0], pt1[1], h, k, a, threshold)
-    perp_dx = -dy / length
-    perp_dy = dx / length
-    for i in range(num_samples + 1):
-        t = i / num_samples
-        x = pt1[0] * (1 - t) + pt2[0] * t
-        y = pt1[1] * (1 - t) + pt2[1] * t
-        for offset in np.linspace(-thickness/2, thickness/2, int(thickness)+1):
-            px = x + perp_dx * offset
-            py = y + perp_dy * offset
-            if is_inside_parabola(px, py, h, k, a, threshold):
-                return True
+        return y1 > a * (x1 - h) ** 2 + c
+    corners = _thick_line_corners(x1, y1, x2, y2, length, thickness)
+    for i in range(4):
+        px, py = corners[i]
+        if py > a * (px - h) ** 2 + c:
+            return True
+        if a > 0:
+            qx, qy = corners[(i + 1) % 4]
+            ex = qx - px
+            ey = qy - py
+            if ex != 0:
+                t = (ey - 2 * a * (px - h) * ex) / (2 * a * ex * ex)
+                if 0 < t < 1:
+                    x = px + t * ex
+                    if py + t * ey > a * (x - h) ** 2 + c:
+                        return True
     return False
 
-def control_logic(wall_info, green_blocks, red_blocks, orange_angle, blue_angle, image_width, image_height, orange_pts=None, blue_pts=None, h_parab=None, k_parab=None, a_parab=None):
+def thick_lines_inside_parabola(pts1, pts2, h, k, a, threshold=2, thickness=8):
+    """
+    Batched thick_line_inside_parabola: pts1 and pts2 are (N, 2) arrays of
+    segment endpoints. Returns an (N,) boolean array.
+    """
+    p1 = np.asarray(pts1, dtype=np.float64).reshape(-1, 2)
+    p2 = np.asarray(pts2, dtype=np.float64).reshape(-1, 2)
+    c = k + threshold
+    d = p2 - p1
+    length = np.hypot(d[:, 0], d[:, 1])
+    safe_length = np.where(length == 0, 1.0, length)
+    offset = np.column_stack((-d[:, 1], d[:, 0])) * (thickness / 2 / safe_length)[:, None]
+    corners = np.stack((p1 + offset, p2 + offset, p2 - offset, p1 - offset), axis=1)  # (N, 4, 2)
+    cx = corners[:, :, 0]
+    cy = corners[:, :, 1]
+    inside = np.any(cy > a * (cx - h) ** 2 + c, axis=1)
+    if a > 0:
+        ex = np.roll(cx, -1, axis=1) - cx
+        ey = np.roll(cy, -1, axis=1) - cy
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (ey - 2 * a * (cx - h) * ex) / (2 * a * ex * ex)
+        valid = (ex != 0) & (t > 0) & (t < 1)
+        t = np.where(valid, t, 0.0)
+        x = cx + t * ex
+        inside |= np.any(valid & (cy + t * ey > a * (x - h) ** 2 + c), axis=1)
+    # Zero-length segments fall back to a plain point test, as in the scalar version
+    point_inside = p1[:, 1] > a * (p1[:, 0] - h) ** 2 + c
+    return np.where(length == 0, point_inside, inside)
+
+def control_logic(wall_info, green_blocks, red_blocks, orange_angle, blue_angle, image_width, image_height, orange_pts=None, blue_pts=None, h_parab=None, k_parab=None, a_parab=None, zone_counts=None):
+    # Returns (steer, Reason); str(reason) gives the text (see events.py)
     # 1. Wall avoidance (highest priority)
     if wall_info.get('wall_y') is not None and wall_info['wall_y'] < image_height * 0.4:
         wall_angle = wall_info.get('wall_angle')
         if wall_angle is not None:
             if wall_angle > 0:
-                return 1.0, f'Wall close, wall_angle={wall_angle:.2f} > 0, steer right to increase angle'
+                return 1.0, Reason(events.REASON_WALL_CLOSE_RIGHT, (wall_angle,))
             elif wall_angle < 0:
-                return -1.0, f'Wall close, wall_angle={wall_angle:.2f} < 0, steer left to decrease angle'
+                return -1.0, Reason(events.REASON_WALL_CLOSE_LEFT, (wall_angle,))
             else:
-                return -1.0, 'Wall close, wall_angle=0, steer left for safety'
-        return -1.0, 'Wall close, always steer left for safety'
+                return -1.0, Reason(events.REASON_WALL_CLOSE_ZERO, ())
+        return -1.0, Reason(events.REASON_WALL_CLOSE_NO_ANGLE, ())
     # 2. Obstacle avoidance (gentler turns)
     closest_green = max(green_blocks, key=lambda b: b['y'], default=None)
     closest_red = max(red_blocks, key=lambda b: b['y'], default=None)
     if closest_green and closest_green['y'] > image_height * 0.5:
         steer = max(-0.4, -0.5 * ((closest_green['y'] - image_height * 0.5) / (image_height * 0.5)))
-        return steer, 'Avoid green: steer left (gentle, capped)'
+        return steer, Reason(events.REASON_AVOID_GREEN, ())
     if closest_red and closest_red['y'] > image_height * 0.6:
         steer = min(0.4, 0.5 * ((closest_red['y'] - image_height * 0.6) / (image_height * 0.4)))
-        return steer, 'Avoid red: steer right (gentle, capped)'
+        return steer, Reason(events.REASON_AVOID_RED, ())
     # 3. Corner handling: react if EITHER line is inside the parabola
     if orange_angle is not None and blue_angle is not None and orange_pts and blue_pts and h_parab is not None and k_parab is not None and a_parab is not None:
         orange_in = False
         blue_in = False
         if orange_pts and all(pt is not None for pt in orange_pts):
-            orange_in = any_thick_line_point_inside_parabola(orange_pts[0], orange_pts[1], h_parab, k_parab, a_parab, threshold=2, thickness=8, num_samples=20)
+            orange_in = thick_line_inside_parabola(orange_pts[0], orange_pts[1], h_parab, k_parab, a_parab, threshold=2, thickness=8)
         if blue_pts and all(pt is not None for pt in blue_pts):
-            blue_in = any_thick_line_point_inside_parabola(blue_pts[0], blue_pts[1], h_parab, k_parab, a_parab, threshold=2, thickness=8, num_samples=20)
+            blue_in = thick_line_inside_parabola(blue_pts[0], blue_pts[1], h_parab, k_parab, a_parab, threshold=2, thickness=8)
+        # Optional pixel-count signal from TriggerZone.count_inside
+        if zone_counts is not None and CORNER_ZONE_MIN_PIXELS > 0:
+            orange_in = orange_in or zone_counts[0] >= CORNER_ZONE_MIN_PIXELS
+            blue_in = blue_in or zone_counts[1] >= CORNER_ZONE_MIN_PIXELS
         # Prioritize orange if both are inside
         if orange_in:
             if orange_angle < 0:
-                return -1.0, 'Corner: any orange line point (thick) inside parabola with negative angle, turn left (CCW)'
+                return -1.0, Reason(events.REASON_CORNER_ORANGE_LEFT, ())
             elif orange_angle > 0:
-                return 1.0, 'Corner: any orange line point (thick) inside parabola with positive angle, turn right (CW)'
+                return 1.0, Reason(events.REASON_CORNER_ORANGE_RIGHT, ())
         elif blue_in:
             if blue_angle < 0:
-                return -1.0, 'Corner: any blue line point (thick) inside parabola with negative angle, turn left (CCW)'
+                return -1.0, Reason(events.REASON_CORNER_BLUE_LEFT, ())
             elif blue_angle > 0:
-                return 1.0, 'Corner: any blue line point (thick) inside parabola with positive angle, turn right (CW)'
+                return 1.0, Reason(events.REASON_CORNER_BLUE_RIGHT, ())
     # 4. Default: go straight
-    return 0.0, 'Default: go straight'
-
-def draw_parabola(image, h, k, a, color=(255,0,255), thickness=2, num_points=200):
-    height, width = image.shape[:2]
-    pts = []
-    for x in np.linspace(0, width-1, num_points):
-        y = a * (x - h) ** 2 + k
-        if 0 <= y < height:
-            pts.append((int(x), int(y)))
-    if len(pts) > 1:
-        for i in range(len(pts)-1):
-            cv2.line(image, pts[i], pts[i+1], color, thickness)
-    return image
+    return 0.0, Reason(events.REASON_DEFAULT, ())
+
+class TriggerZone:
+    """
+    Parabola trigger zone and exclusion rectangle, built once for a fixed frame size.
+    Holds the zone as a binary mask, the overlay polyline and rectangle, and
+    answers "how many mask pixels are inside the zone" with one masked reduction.
+    """
+    def __init__(self, width, height, h, k, a, threshold=2, rect_width=520, rect_height=120, num_points=200):
+        self.width = width
+        self.height = height
+        self.h = h
+        self.k = k
+        self.a = a
+        self.threshold = threshold
+        ys = np.arange(height, dtype=np.float64)[:, None]
+        xs = np.arange(width, dtype=np.float64)[None, :]
+        self.mask = np.where(ys > a * (xs - h) ** 2 + k + threshold, 255, 0).astype(np.uint8)
+        self._scratch = np.empty_like(self.mask)
+        # num_points samples across the width, kept where the parabola is on screen
+        px = np.linspace(0, width - 1, num_points)
+        py = a * (px - h) ** 2 + k
+        keep = (py >= 0) & (py < height)
+        self.polyline = np.column_stack((px[keep], py[keep])).astype(np.int32).reshape(-1, 1, 2)
+        # Exclusion rectangle (same as simulation main.py)
+        rect_center_x = width // 2
+        rect_center_y = height - 1 - (rect_height // 2) - 10
+        self.rect = (rect_center_x - rect_width // 2, rect_center_y - rect_height // 2,
+                     rect_center_x + rect_width // 2, rect_center_y + rect_height // 2)
+
+    def count_inside(self, mask):
+        """Number of non-zero pixels of a full-frame mask that lie inside the zone."""
+        return cv2.countNonZero(cv2.bitwise_and(mask, self.mask, dst=self._scratch))
+
+    def draw(self, image, rect_color=(0, 255, 255), parabola_color=(255, 0, 255), thickness=2):
+        left, top, right, bottom = self.rect
+        cv2.rectangle(image, (left, top), (right, bottom), rect_color, thickness)
+        if len(self.polyline) > 1:
+            cv2.polylines(image, [self.polyline], False, parabola_color, thickness)
+        return image
+
+def make_trigger_zone(width, height):
+    """Parabola trigger zone used by main (and by offline replay)."""
+    h_parab = width // 2
+    k_parab = int(height * 0.55)
+    a_parab = 0.0011
+    return TriggerZone(width, height, h_parab, k_parab, a_parab)
+
+def draw_block_boxes(image, blocks):
+    """Draw bounding boxes and labels for all detected blocks."""
+    # MODIFIED FOR DEBUGGING - DRAW ALL BLOCKS WITH LABELS
+    for b in blocks:
+        # Determine color for bounding box based on detected block name
+        box_color_bgr = (255, 255, 255) # Default to white for unrecognized blocks
+        label_text = b['color']
+
+        if b['color'] == 'red_block':      # Real BLUE object
+            box_color_bgr = (255, 0, 0)    # Blue box
+        elif b['color'] == 'green_block':  # Real GREEN object
+            box_color_bgr = (0, 255, 0)    # Green box
+        elif b['color'] == 'orange_block': # Real YELLOW object
+            box_color_bgr = (0, 255, 255)  # Yellow box
+        elif b['color'] == 'blue_block':   # Real RED object
+            box_color_bgr = (0, 0, 255)    # Red box
+
+        x, y = b['position']
+        w, h_ = b['size']
+        top_left = (x - w//2, y - h_//2)
+        bottom_right = (x + w//2, y + h_//2)
+        cv2.rectangle(image, top_left, bottom_right, box_color_bgr, 2)
+        cv2.putText(image, label_text, (top_left[0], top_left[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, box_color_bgr, 1)
+
+def make_command(steering, speed, label, steer=0.0):
+    """
+    Actuator command. steering is 'left', 'right' or 'center'; speed is the
+    forward duty cycle in percent, 0 stops the drive motor. steer is the
+    continuous value in [-1, 1] used instead of steering by PROPORTIONAL_STEERING.
+    """
+    return {'steering': steering, 'speed': speed, 'label': label, 'steer': steer}
+
+def process_frame(frame_bgr, zone, classifier=None, timer=NULL_TIMER, log=NULL_LOG):
+    """
+    Vision and decision for one frame (everything except actuation).
+    Returns a dict with the detector outputs, control_logic's steer/steer_reason
+    and the actuator command. Wall override state is kept between frames on
+    the function itself. Stage times are charged to `timer` (see instrumentation.py)
+    and [DEBUG] events go to `log` (see events.py).
+    """
+    # --- Vision processing (one shared FrameContext: HSV/gray/masks computed once) ---
+    ctx = FrameContext(frame_bgr, classifier=classifier)
+    wall_info = detect_wall_and_angle_ctx(ctx, visualize=False)
+    timer.mark('wall')
+    corner_info = detect_corners_ctx(ctx, draw_overlay=False)
+    zone_counts = None
+    if CORNER_ZONE_MIN_PIXELS > 0:
+        zone_counts = (zone.count_inside(ctx.mask('line_orange')), zone.count_inside(ctx.mask('line_blue')))
+    timer.mark('corners')
+    blocks = detect_blocks_ctx(ctx)
+    timer.mark('blocks')
+
+    # Debug: Print detected blocks
+    # print("Detected blocks:", blocks)
+
+    # --- Draw bounding boxes for detected blocks (green/red) ---
+    draw_block_boxes(frame_bgr, blocks)
+
+    # --- Draw exclusion rectangle and parabola overlay (same as simulation, cached geometry) ---
+    zone.draw(frame_bgr)
+    timer.mark('overlay')
+
+    # Prepare block lists for control logic
+    green_blocks = [{'x': b['position'][0], 'y': b['position'][1]} for b in blocks if b['color'] == 'green_block']
+    red_blocks = [{'x': b['position'][0], 'y': b['position'][1]} for b in blocks if b['color'] == 'red_block']
+
+    orange_angle = corner_info.get('orange_angle')
+    blue_angle = corner_info.get('blue_angle')
+    orange_pts = corner_info.get('orange_pts')
+    blue_pts = corner_info.get('blue_pts')
+
+    result = {
+        'wall_info': wall_info,
+        'corner_info': corner_info,
+        'blocks': blocks,
+        'zone_counts': zone_counts,
+    }
+
+    # --- WALL ANGLE OVERRIDE RULE (HIGHEST PRIORITY, FIRST CHECK, CONFIGURABLE) ---
+    state = process_frame
+    if not hasattr(state, 'wall_override_direction'):
+        state.wall_override_direction = 0
+    if not hasattr(state, 'wall_override_timer'):
+        state.wall_override_timer = 0
+    if not hasattr(state, 'wall_override_phase'):
+        state.wall_override_phase = None
+    wall_angle = wall_info.get('wall_angle', 0)
+    if WALL_ANGLE_OVERRIDE_RULE == 'wall':
+        # Angle-based override (as before)
+        if state.wall_override_direction != 0:
+            if state.wall_override_direction == -1 and wall_angle >= 5:
+                log.log(events.EV_OVERRIDE_END_LEFT, wall_angle)
+                state.wall_override_direction = 0
+            elif state.wall_override_direction == 1 and wall_angle <= -5:
+                log.log(events.EV_OVERRIDE_END_RIGHT, wall_angle)
+                state.wall_override_direction = 0
+        if state.wall_override_direction == 0:
+            if wall_angle < 0:
+                state.wall_override_direction = -1
+                log.log(events.EV_OVERRIDE_TRIGGER_LEFT, wall_angle)
+            elif wall_angle > 0:
+                state.wall_override_direction = 1
+                log.log(events.EV_OVERRIDE_TRIGGER_RIGHT, wall_angle)
+        if state.wall_override_direction != 0:
+            steer = state.wall_override_direction
+            log.log(events.EV_OVERRIDE_ACTIVE, 'right' if steer > 0 else 'left', wall_angle)
+            result['steer'] = float(steer)
+            result['steer_reason'] = Reason(events.REASON_WALL_OVERRIDE, ())
+            if steer < 0:
+                result['command'] = make_command('left', 40, 'OVERRIDE: Steer LEFT', -1.0)
+            else:
+                result['command'] = make_command('right', 40, 'OVERRIDE: Steer RIGHT', 1.0)
+            timer.mark('control')
+            return result
+    elif WALL_ANGLE_OVERRIDE_RULE == 'time':
+        # Time-based override: steer left/right for 2s, then opposite for 1s
+        if state.wall_override_timer > 0:
+            steer = state.wall_override_direction
+            log.log(events.EV_TIME_OVERRIDE_ACTIVE, 'right' if steer > 0 else 'left', state.wall_override_timer, state.wall_override_phase)
+            result['steer'] = float(steer)
+            result['steer_reason'] = Reason(events.REASON_WALL_TIME_OVERRIDE, ())
+            if steer < 0:
+                result['command'] = make_command('left', 40, 'TIME OVERRIDE: Steer LEFT', -1.0)
+            else:
+                result['command'] = make_command('right', 40, 'TIME OVERRIDE: Steer RIGHT', 1.0)
+            state.wall_override_timer -= DT
+            if state.wall_override_timer <= 0 and state.wall_override_phase == 'first':
+                # Switch to opposite direction for 1s
+                state.wall_override_direction *= -1
+                state.wall_override_timer = 1.0
+                state.wall_override_phase = 'second'
+                log.log(events.EV_TIME_OVERRIDE_PHASE2, 'right' if state.wall_override_direction > 0 else 'left')
+            elif state.wall_override_timer <= 0 and state.wall_override_phase == 'second':
+                log.log(events.EV_TIME_OVERRIDE_END)
+                state.wall_override_direction = 0
+                state.wall_override_phase = None
+            timer.mark('control')
+            return result
+        if state.wall_override_direction == 0:
+            if wall_angle < 0:
+                state.wall_override_direction = -1
+                state.wall_override_timer = 2.0
+                state.wall_override_phase = 'first'
+                log.log(events.EV_TIME_OVERRIDE_TRIGGER_LEFT, wall_angle)
+            elif wall_angle > 0:
+                state.wall_override_direction = 1
+                state.wall_override_timer = 2.0
+                state.wall_override_phase = 'first'
+                log.log(events.EV_TIME_OVERRIDE_TRIGGER_RIGHT, wall_angle)
+    # If 'none', do nothing (no override)
+
+    # --- Advanced control logic (priority system) ---
+    steer, steer_reason = control_logic(
+        wall_info, green_blocks, red_blocks, orange_angle, blue_angle,
+        FRAME_WIDTH, FRAME_HEIGHT, orange_pts, blue_pts, zone.h, zone.k, zone.a,
+        zone_counts
+    )
+    result['steer'] = steer
+    result['steer_reason'] = steer_reason
+
+    # --- Choose actuator command ---
+    if wall_info.get('wall_y') is not None and wall_info['wall_y'] > FRAME_HEIGHT * 0.9:
+        result['command'] = make_command('center', 0, 'STOP: Wall too close')
+    elif steer < -0.2:
+        result['command'] = make_command('left', 40, 'Steer LEFT', steer)
+    elif steer > 0.2:
+        result['command'] = make_command('right', 40, 'Steer RIGHT', steer)
+    else:
+        result['command'] = make_command('center', 50, 'FORWARD', steer)
+    timer.mark('control')
+    return result
+
+def show_frame(frame_bgr):
+    """Show the camera frame with overlays. Returns True if 'q' was pressed."""
+    cv2.imshow('Pi Camera View', frame_bgr)
+    return cv2.waitKey(1) & 0xFF == ord('q')
 
 def main():
     print("[INFO] Starting Raspberry Pi robot main loop...")
     try:
+        control.set_backend(MOTOR_BACKEND)
         control.setup_gpio()
-        print("[INFO] GPIO initialized.")
+        print(f"[INFO] GPIO initialized ({control.backend.name} backend).")
     except Exception as e:
         print(f"Warning: Failed to initialize GPIO: {e}")
         print("Running in simulation mode (no actual motor control)")
+        control.set_backend('fake')
+        control.setup_gpio()
 
     # Initialize PiCamera2
     picam2 = Picamera2()
@@ -109,210 +415,98 @@ def main():
     picam2.start()
     time.sleep(2)  # Let camera warm up
 
-    h_parab = FRAME_WIDTH // 2
-    k_parab = int(FRAME_HEIGHT * 0.55)
-    a_parab = 0.0011
+    zone = make_trigger_zone(FRAME_WIDTH, FRAME_HEIGHT)
+    classifier = ColorClassifier() if USE_COLOR_LUT else None
+    recorder = SessionRecorder(RECORD_SESSION, RECORD_FRAME_MODE) if RECORD_SESSION else None
+    timer = FrameTimer(budget_s=DT, summary_every=TIMING_SUMMARY_EVERY) if TIMING_ENABLED else NULL_TIMER
+    log = EventLog(LOG_FILE, min_interval=LOG_MIN_INTERVAL).start()
+    # GPIO writes happen on the actuator's own thread, only when the command changes
+    actuator = ActuatorController(control, log, proportional=PROPORTIONAL_STEERING).start()
+
+    # Convert from RGB to BGR for OpenCV/vision
+    # frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR) # TEST: Remove this conversion
+    # TEST: Frames from capture_array() are used directly, assuming they are already BGR
 
+    pipeline = None
     print("[INFO] Main loop running. Press Ctrl+C to quit.")
     try:
-        while True:
-            start_time = time.time()
-            frame = picam2.capture_array()
-            # Convert from RGB to BGR for OpenCV/vision
-            # frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR) # TEST: Remove this conversion
-            frame_bgr = frame # TEST: Assume frame is already BGR or test direct usage
-
-            # --- Vision processing ---
-            wall_info = detect_wall_and_angle(frame_bgr, visualize=False)
-            corner_info = detect_corners(frame_bgr, draw_overlay=False)
-            blocks = detect_blocks(frame_bgr)
-
-            # Debug: Print detected blocks
-            # print("Detected blocks:", blocks)
-
-            # --- Draw bounding boxes for detected blocks (green/red) ---
-            # MODIFIED FOR DEBUGGING - DRAW ALL BLOCKS WITH LABELS
-            for b in blocks:
-                # Determine color for bounding box based on detected block name
-                box_color_bgr = (255, 255, 255) # Default to white for unrecognized blocks
-                label_text = b['color']
-
-                if b['color'] == 'red_block':      # Real BLUE object
-                    box_color_bgr = (255, 0, 0)    # Blue box
-                elif b['color'] == 'green_block':  # Real GREEN object
-                    box_color_bgr = (0, 255, 0)    # Green box
-                elif b['color'] == 'orange_block': # Real YELLOW object
-                    box_color_bgr = (0, 255, 255)  # Yellow box
-                elif b['color'] == 'blue_block':   # Real RED object
-                    box_color_bgr = (0, 0, 255)    # Red box
-
-                x, y = b['position']
-                w, h_ = b['size']
-                top_left = (x - w//2, y - h_//2)
-                bottom_right = (x + w//2, y + h_//2)
-                cv2.rectangle(frame_bgr, top_left, bottom_right, box_color_bgr, 2)
-                cv2.putText(frame_bgr, label_text, (top_left[0], top_left[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, box_color_bgr, 1)
-
-            # --- Use the same exclusion rectangle as simulation (main.py) ---
-            rect_width = 520
-            rect_height = 120
-            center_x_img = FRAME_WIDTH // 2
-            rect_center_x = center_x_img
-            rect_center_y = FRAME_HEIGHT - 1 - (rect_height // 2) - 10
-            rect_left = rect_center_x - rect_width // 2
-            rect_top = rect_center_y - rect_height // 2
-            rect_right = rect_center_x + rect_width // 2
-            rect_bottom = rect_center_y + rect_height // 2
-            cv2.rectangle(frame_bgr, (rect_left, rect_top), (rect_right, rect_bottom), (0, 255, 255), 2)
-
-            # --- Draw parabola overlay (same as simulation) ---
-            frame_bgr = draw_parabola(frame_bgr, h_parab, k_parab, a_parab, color=(255,0,255), thickness=2)
-
-            # Prepare block lists for control logic
-            green_blocks = [{'x': b['position'][0], 'y': b['position'][1]} for b in blocks if b['color'] == 'green_block']
-            red_blocks = [{'x': b['position'][0], 'y': b['position'][1]} for b in blocks if b['color'] == 'red_block']
-
-            orange_angle = corner_info.get('orange_angle')
-            blue_angle = corner_info.get('blue_angle')
-            orange_pts = corner_info.get('orange_pts')
-            blue_pts = corner_info.get('blue_pts')
-
-            # --- WALL ANGLE OVERRIDE RULE (HIGHEST PRIORITY, FIRST CHECK, CONFIGURABLE) ---
-            if not hasattr(main, 'wall_override_direction'):
-                main.wall_override_direction = 0
-            if not hasattr(main, 'wall_override_timer'):
-                main.wall_override_timer = 0
-            if not hasattr(main, 'wall_override_phase'):
-                main.wall_override_phase = None
-            wall_override_triggered = False
-            wall_angle = wall_info.get('wall_angle', 0)
-            if WALL_ANGLE_OVERRIDE_RULE == 'wall':
-                # Angle-based override (as before)
-                if main.wall_override_direction != 0:
-                    if main.wall_override_direction == -1 and wall_angle >= 5:
-                        print(f"[DEBUG] WALL ANGLE OVERRIDE END: wall_angle={wall_angle:.2f} >= 5, stop steering left")
-                        main.wall_override_direction = 0
-                    elif main.wall_override_direction == 1 and wall_angle <= -5:
-                        print(f"[DEBUG] WALL ANGLE OVERRIDE END: wall_angle={wall_angle:.2f} <= -5, stop steering right")
-                        main.wall_override_direction = 0
-                if main.wall_override_direction == 0:
-                    if wall_angle < 0:
-                        main.wall_override_direction = -1
-                        print(f"[DEBUG] WALL ANGLE OVERRIDE TRIGGERED: wall_angle={wall_angle:.2f} < 0, steer left until >= 5")
-                    elif wall_angle > 0:
-                        main.wall_override_direction = 1
-                        print(f"[DEBUG] WALL ANGLE OVERRIDE TRIGGERED: wall_angle={wall_angle:.2f} > 0, steer right until <= -5")
-                if main.wall_override_direction != 0:
-                    steer = main.wall_override_direction
-                    print(f"[DEBUG] WALL ANGLE OVERRIDE ACTIVE: steer {'right' if steer > 0 else 'left'} (wall_angle={wall_angle:.2f})")
-                    # Actuate robot for override
-                    if steer < 0:
-                        control.steer_left()
-                        control.move_forward(40)
-                        print("[ACTION] OVERRIDE: Steer LEFT")
-                    else:
-                        control.steer_right()
-                        control.move_forward(40)
-                        print("[ACTION] OVERRIDE: Steer RIGHT")
-                    # Show camera frame with overlays (for debugging)
-                    if SHOW_CAMERA_FEED:
-                        cv2.imshow('Pi Camera View', frame_bgr)
-                        if cv2.waitKey(1) & 0xFF == ord('q'):
-                            break
-                    # Maintain loop timing
-                    elapsed = time.time() - start_time
-                    if elapsed < DT:
-                        time.sleep(DT - elapsed)
-                    continue
-            elif WALL_ANGLE_OVERRIDE_RULE == 'time':
-                # Time-based override: steer left/right for 2s, then opposite for 1s
-                if main.wall_override_timer > 0:
-                    steer = main.wall_override_direction
-                    print(f"[DEBUG] WALL ANGLE TIME OVERRIDE ACTIVE: steer {'right' if steer > 0 else 'left'} (timer {main.wall_override_timer:.2f}s left, phase={main.wall_override_phase})")
-                    if steer < 0:
-                        control.steer_left()
-                        control.move_forward(40)
-                        print("[ACTION] TIME OVERRIDE: Steer LEFT")
-                    else:
-                        control.steer_right()
-                        control.move_forward(40)
-                        print("[ACTION] TIME OVERRIDE: Steer RIGHT")
-                    main.wall_override_timer -= DT
-                    if main.wall_override_timer <= 0 and main.wall_override_phase == 'first':
-                        # Switch to opposite direction for 1s
-                        main.wall_override_direction *= -1
-                        main.wall_override_timer = 1.0
-                        main.wall_override_phase = 'second'
-                        print(f"[DEBUG] WALL ANGLE TIME OVERRIDE PHASE 2: steer {'right' if main.wall_override_direction > 0 else 'left'} for 1s")
-                    elif main.wall_override_timer <= 0 and main.wall_override_phase == 'second':
-                        print(f"[DEBUG] WALL ANGLE TIME OVERRIDE END")
-                        main.wall_override_direction = 0
-                        main.wall_override_phase = None
-                    # Show camera frame with overlays (for debugging)
-                    if SHOW_CAMERA_FEED:
-                        cv2.imshow('Pi Camera View', frame_bgr)
-                        if cv2.waitKey(1) & 0xFF == ord('q'):
-                            break
-                    elapsed = time.time() - start_time
-                    if elapsed < DT:
-                        time.sleep(DT - elapsed)
-                    continue
-                if main.wall_override_direction == 0:
-                    if wall_angle < 0:
-                        main.wall_override_direction = -1
-                        main.wall_override_timer = 2.0
-                        main.wall_override_phase = 'first'
-                        print(f"[DEBUG] WALL ANGLE TIME OVERRIDE TRIGGERED: wall_angle={wall_angle:.2f} < 0, steer left for 2s then right for 1s")
-                    elif wall_angle > 0:
-                        main.wall_override_direction = 1
-                        main.wall_override_timer = 2.0
-                        main.wall_override_phase = 'first'
-                        print(f"[DEBUG] WALL ANGLE TIME OVERRIDE TRIGGERED: wall_angle={wall_angle:.2f} > 0, steer right for 2s then left for 1s")
-            # If 'none', do nothing (no override)
-
-            # --- Advanced control logic (priority system) ---
-            steer, steer_reason = control_logic(
-                wall_info, green_blocks, red_blocks, orange_angle, blue_angle,
-                FRAME_WIDTH, FRAME_HEIGHT, orange_pts, blue_pts, h_parab, k_parab, a_parab
-            )
-
-            # --- Actuate robot ---
-            if wall_info.get('wall_y') is not None and wall_info['wall_y'] > FRAME_HEIGHT * 0.9:
-                control.stop_drive_motor()
-                control.center_steering()
-                print("[ACTION] STOP: Wall too close")
-            else:
-                if steer < -0.2:
-                    control.steer_left()
-                    control.move_forward(40)
-                    print("[ACTION] Steer LEFT")
-                elif steer > 0.2:
-                    control.steer_right()
-                    control.move_forward(40)
-                    print("[ACTION] Steer RIGHT")
-                else:
-                    control.center_steering()
-                    control.move_forward(50)
-                    print("[ACTION] FORWARD")
-
-            # --- Show camera frame with overlays (for debugging) ---
-            if SHOW_CAMERA_FEED:
-                cv2.imshow('Pi Camera View', frame_bgr)
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+        if PIPELINE_MODE:
+            # Capture runs on its own thread (actuation already does); vision runs here
+            pipeline = Pipeline(picam2.capture_array)
+            pipeline.start()
+            while True:
+                timer.begin_frame()
+                item = pipeline.next_frame()
+                if item is None:
+                    break
+                capture_time, frame_bgr = item
+                raw = frame_bgr.copy() if recorder else None  # before overlays are drawn
+                timer.mark('capture')  # time spent waiting for the capture thread
+                result = process_frame(frame_bgr, zone, classifier, timer, log)
+                if actuator.error is not None:
+                    break  # output thread died (drive motor already stopped); reported below
+                actuator.submit(result['command'])
+                timer.mark('actuate')  # hand-off only; GPIO calls run on the actuator thread
+                if recorder:
+                    recorder.record(raw, capture_time, result)
+                if SHOW_CAMERA_FEED and show_frame(frame_bgr):
+                    break
+                timer.mark('display')
+                timer.end_frame()
+            if pipeline.error is not None:
+                print(f"[ERROR] Capture failed: {pipeline.error}")
+        else:
+            while True:
+                start_time = time.time()
+                timer.begin_frame()
+                frame_bgr = picam2.capture_array()
+                capture_time = time.perf_counter()
+                raw = frame_bgr.copy() if recorder else None  # before overlays are drawn
+                timer.mark('capture')
+                result = process_frame(frame_bgr, zone, classifier, timer, log)
+                if actuator.error is not None:
+                    break  # output thread died (drive motor already stopped); reported below
+                actuator.submit(result['command'])
+                timer.mark('actuate')  # hand-off only; GPIO calls run on the actuator thread
+                if recorder:
+                    recorder.record(raw, capture_time, result)
+
+                # --- Show camera frame with overlays (for debugging) ---
+                if SHOW_CAMERA_FEED and show_frame(frame_bgr):
                     break
+                timer.mark('display')
+                timer.end_frame()
 
-            # --- Maintain loop timing ---
-            elapsed = time.time() - start_time
-            if elapsed < DT:
-                time.sleep(DT - elapsed)
+                # --- Maintain loop timing ---
+                elapsed = time.time() - start_time
+                if elapsed < DT:
+                    time.sleep(DT - elapsed)
     except KeyboardInterrupt:
         print("Loop interrupted by user.")
     finally:
         print("Cleaning up...")
+        if pipeline is not None:
+            pipeline.stop()
+        actuator.stop()
+        if actuator.error is not None:
+            print(f"[ERROR] Actuator failed: {actuator.error}")
+        if actuator.watchdog_stops:
+            print(f"[INFO] Watchdog stopped the drive motor {actuator.watchdog_stops} times")
+        if recorder is not None:
+            recorder.close()
+            print(f"[INFO] Recorded {recorder.written} frames to {RECORD_SESSION} ({recorder.dropped} dropped)")
+            if recorder.error is not None:
+                print(f"[ERROR] Session recording failed: {recorder.error}")
+        log.stop()
+        if log.dropped:
+            print(f"[INFO] Event log dropped {log.dropped} records (queue full)")
+        if timer.frames and TIMING_REPORT:
+            timer.write_report(TIMING_REPORT)
+            print(f"[INFO] Wrote timing report for {timer.frames} frames to {TIMING_REPORT}")
         picam2.stop()
         if SHOW_CAMERA_FEED:
             cv2.destroyAllWindows()
         control.cleanup_gpio()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,175 @@
+import json
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from events import Reason
+
+# Session directory layout:
+#   meta.json      frame size and storage mode
+#   frames.bin     frames appended back to back (raw BGR, raw Y plane or JPEG)
+#   records.jsonl  one line per frame: timestamp, frame offset/length, detector
+#                  outputs, control_logic's (steer, reason) and the actuator command
+FRAME_MODES = ('bgr', 'y', 'jpeg')
+SESSION_VERSION = 1
+# Longest close() waits for the writer to drain the queue (seconds)
+CLOSE_TIMEOUT = 5.0
+
+
+def _to_jsonable(value):
+    if isinstance(value, Reason):
+        return str(value)  # formatted here, on the writer thread
+    if isinstance(value, dict):
+        return {k: _to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    return value
+
+
+def summarize_result(result):
+    """The parts of a process_frame result worth recording (no images)."""
+    wall_info = result['wall_info']
+    corner_info = result['corner_info']
+    return {
+        'wall': {k: wall_info.get(k) for k in ('wall_y', 'wall_angle', 'left_pt', 'right_pt')},
+        'corners': {k: corner_info.get(k) for k in ('orange_angle', 'blue_angle', 'orange_pts', 'blue_pts')},
+        'blocks': [{'color': b['color'], 'position': b['position'], 'size': b['size']} for b in result['blocks']],
+        'steer': result.get('steer'),
+        'reason': result.get('steer_reason'),
+        'command': result.get('command'),
+    }
+
+
+class SessionRecorder:
+    """
+    Records frames and decisions to a session directory from a background thread.
+    record() only enqueues; if the writer falls behind, frames are dropped
+    (and counted) rather than blocking the control loop. A write error stops
+    the writer and is kept in `error`; later frames are dropped.
+    """
+    def __init__(self, path, frame_mode='bgr', jpeg_quality=80, queue_size=64):
+        if frame_mode not in FRAME_MODES:
+            raise ValueError(f"frame_mode must be one of {FRAME_MODES}, got {frame_mode!r}")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.frame_mode = frame_mode
+        self.jpeg_quality = jpeg_quality
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._frames_file = open(os.path.join(path, 'frames.bin'), 'wb')
+        self._records_file = open(os.path.join(path, 'records.jsonl'), 'w', buffering=1)
+        self._offset = 0
+        self._meta_written = False
+        self.error = None
+        self._thread = threading.Thread(target=self._writer_loop, name='session-writer', daemon=True)
+        self._thread.start()
+
+    def record(self, frame_bgr, timestamp, result):
+        """Queue one frame (not modified afterwards by the caller) and its process_frame result."""
+        if self.error is not None:
+            self.dropped += 1
+            return
+        try:
+            self._queue.put_nowait((frame_bgr, timestamp, summarize_result(result)))
+        except queue.Full:
+            self.dropped += 1
+
+    def _encode(self, frame_bgr):
+        if self.frame_mode == 'y':
+            return cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY).tobytes()
+        if self.frame_mode == 'jpeg':
+            ok, buf = cv2.imencode('.jpg', frame_bgr, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if not ok:
+                raise RuntimeError("JPEG encoding failed")
+            return buf.tobytes()
+        return np.ascontiguousarray(frame_bgr).tobytes()
+
+    def _write_meta(self, frame_bgr):
+        meta = {
+            'version': SESSION_VERSION,
+            'frame_mode': self.frame_mode,
+            'width': frame_bgr.shape[1],
+            'height': frame_bgr.shape[0],
+            'created': time.time(),
+        }
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        self._meta_written = True
+
+    def _writer_loop(self):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                self._write(*item)
+        except Exception as e:
+            self.error = e
+
+    def _write(self, frame_bgr, timestamp, summary):
+        if not self._meta_written:
+            self._write_meta(frame_bgr)
+        data = self._encode(frame_bgr)
+        self._frames_file.write(data)
+        record = {'i': self.written, 't': timestamp, 'offset': self._offset, 'length': len(data)}
+        record.update(summary)
+        self._records_file.write(json.dumps(_to_jsonable(record)) + '\n')
+        self._offset += len(data)
+        self.written += 1
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        """Flush everything still queued (waiting at most `timeout` seconds) and close the files."""
+        if self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass  # writer stuck: give up on the rest of the queue
+            self._thread.join(timeout)
+        for f in (self._frames_file, self._records_file):
+            try:
+                f.close()
+            except OSError as e:
+                if self.error is None:
+                    self.error = e
+
+
+class Session:
+    """Read-only view of a recorded session; frames are memory-mapped, not loaded."""
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        with open(os.path.join(path, 'records.jsonl')) as f:
+            self.records = [json.loads(line) for line in f if line.strip()]
+        frames_path = os.path.join(path, 'frames.bin')
+        if os.path.getsize(frames_path) > 0:
+            self._data = np.memmap(frames_path, dtype=np.uint8, mode='r')
+        else:
+            self._data = np.zeros(0, dtype=np.uint8)
+        self.width = self.meta['width']
+        self.height = self.meta['height']
+        self.frame_mode = self.meta['frame_mode']
+
+    def __len__(self):
+        return len(self.records)
+
+    def frame(self, i):
+        """Frame i as a BGR image (Y-only sessions are expanded to gray BGR)."""
+        record = self.records[i]
+        data = self._data[record['offset']:record['offset'] + record['length']]
+        if self.frame_mode == 'jpeg':
+            return cv2.imdecode(np.asarray(data), cv2.IMREAD_COLOR)
+        if self.frame_mode == 'y':
+            return cv2.cvtColor(data.reshape(self.height, self.width), cv2.COLOR_GRAY2BGR)
+        return np.array(data.reshape(self.height, self.width, 3))
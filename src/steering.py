@@ -0,0 +1,61 @@
+from control import MAX_STEER_ANGLE_PHYSICAL
+
+# --- Steering motor model (calibrate on the car) ---
+STEER_FULL_TRAVEL_TIME = 0.30  # seconds from centre to full lock at 100% duty
+STEER_KP = 8.0  # duty percent per degree of angle error
+STEER_MIN_DUTY = 30  # below this the steering motor does not move the wheels
+STEER_ANGLE_TOLERANCE = 1.0  # degrees; closer than this the motor is switched off
+STEER_CONTROL_PERIOD = 0.01  # seconds between controller updates
+
+
+class SteeringEstimator:
+    """
+    Open-loop estimate of the wheel angle (degrees, negative = left).
+    The motor is assumed to move the wheels at a rate proportional to its duty
+    cycle, covering MAX_STEER_ANGLE_PHYSICAL in full_travel_time at 100%, and
+    to hold the angle when switched off. The estimate is clamped to the
+    physical limits, which is also where it re-synchronises at full lock.
+    """
+    def __init__(self, max_angle=MAX_STEER_ANGLE_PHYSICAL, full_travel_time=STEER_FULL_TRAVEL_TIME):
+        self.max_angle = max_angle
+        self.rate = max_angle / full_travel_time  # degrees per second at 100% duty
+        self.angle = 0.0
+        self.direction = 0  # -1 left, 0 off, 1 right
+        self.duty = 0
+        self.last_time = None
+
+    def update(self, now):
+        """Integrate the current motor drive up to `now`. Returns the estimated angle."""
+        if self.last_time is not None and self.direction:
+            self.angle += self.direction * self.duty / 100.0 * self.rate * (now - self.last_time)
+            self.angle = max(-self.max_angle, min(self.max_angle, self.angle))
+        self.last_time = now
+        return self.angle
+
+    def set_drive(self, direction, duty, now):
+        """Record a change of motor drive (after integrating the previous one)."""
+        self.update(now)
+        self.direction = direction
+        self.duty = duty
+
+
+class ProportionalSteering:
+    """Drives the estimated wheel angle toward a target with a proportional duty cycle."""
+    def __init__(self, max_angle=MAX_STEER_ANGLE_PHYSICAL, kp=STEER_KP, min_duty=STEER_MIN_DUTY,
+                 tolerance=STEER_ANGLE_TOLERANCE):
+        self.max_angle = max_angle
+        self.kp = kp
+        self.min_duty = min_duty
+        self.tolerance = tolerance
+
+    def target_angle(self, steer):
+        """Wheel angle for a control_logic steer value in [-1, 1]."""
+        return max(-1.0, min(1.0, steer)) * self.max_angle
+
+    def drive(self, target_angle, angle):
+        """Motor drive (direction, duty percent) that moves `angle` toward `target_angle`."""
+        error = target_angle - angle
+        if abs(error) <= self.tolerance:
+            return 0, 0
+        duty = int(round(min(100.0, max(self.min_duty, self.kp * abs(error)))))
+        return (1 if error > 0 else -1), duty
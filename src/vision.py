@@ -83,77 +83,309 @@ HSC_SEEN_BLUE_UPPER = np.array([130, 255, 255])
 HSC_SEEN_YELLOW_LOWER = np.array([20, 100, 100])
 HSC_SEEN_YELLOW_UPPER = np.array([35, 255, 255])
 
+# Grayscale level below which a pixel is treated as black wall
+WALL_BLACK_THRESHOLD = 40
+# Name of the black-wall class when masks come from a ColorClassifier
+WALL_MASK = 'wall_black'
+
+# --- Named masks served by FrameContext ---
+# Each entry lists the (lower, upper) HSV ranges that are OR-ed together.
+MASK_RANGES = {
+    'block_red': [(HSC_SEEN_RED_LOWER1, HSC_SEEN_RED_UPPER1), (HSC_SEEN_RED_LOWER2, HSC_SEEN_RED_UPPER2)],
+    'block_green': [(HSC_SEEN_GREEN_LOWER, HSC_SEEN_GREEN_UPPER)],
+    'block_blue': [(HSC_SEEN_BLUE_LOWER, HSC_SEEN_BLUE_UPPER)],
+    'block_yellow': [(HSC_SEEN_YELLOW_LOWER, HSC_SEEN_YELLOW_UPPER)],
+    'line_orange': [(ORANGE_HSV_LOWER, ORANGE_HSV_UPPER)],
+    'line_blue': [(BLUE_HSV_LOWER, BLUE_HSV_UPPER)],
+}
+
+# Rows scanned (from the bottom of the image up) when looking for line endpoints
+CORNER_BAND_HEIGHT = 9
+
+# --- Per-detector regions of interest ---
+# (left, top, right, bottom) as fractions of the frame. Each detector converts,
+# masks and searches contours only inside a zero-copy view of its ROI and maps
+# results back to frame coordinates. detect_corners further limits its ROI to
+# the bottom band_height rows, which is all it ever scans.
+# The wall ROI stays full-frame: rpi's STOP check needs wall_y near the bottom.
+# Blocks skip the top quarter: control_logic only reacts to blocks whose centre
+# is below 50% of the image height. A tall, close block that reaches into the
+# top quarter is clipped there, so its centre reads up to 0.125 * height lower
+# than on the full frame and it can pass the 50% (green) / 60% (red) threshold
+# a few frames earlier. These are the defaults of the *_ctx detectors that
+# rpi.process_frame calls; the detect_*() wrappers always search FULL_FRAME
+# at full resolution, as before the tables existed.
+FULL_FRAME = (0.0, 0.0, 1.0, 1.0)
+DETECTOR_ROIS = {
+    'blocks': (0.0, 0.25, 1.0, 1.0),
+    'corners': (0.0, 0.0, 1.0, 1.0),
+    'wall': (0.0, 0.0, 1.0, 1.0),
+}
+
+# --- Per-detector resolution ---
+# Scale factor of the image each detector runs on (1.0 = full resolution,
+# 0.5 / 0.25 = cached pyramid levels). Results are always rescaled to the
+# caller's frame coordinates.
+DETECTOR_SCALES = {
+    'blocks': 1.0,
+    'corners': 1.0,
+    'wall': 1.0,
+}
+
+# Block masks in detection order, mapped to the reported block name
+BLOCK_MASKS = [
+    ('block_red', 'red_block'),        # Real RED object
+    ('block_green', 'green_block'),    # Real GREEN object
+    ('block_blue', 'blue_block'),      # Real BLUE object
+    ('block_yellow', 'orange_block'),  # Real YELLOW object
+]
+
+
+class FrameContext:
+    """
+    Per-frame cache shared by all detectors.
+    HSV, grayscale and every named mask are computed lazily, at most once per frame.
+    sub()/roi() return child contexts over a view of the image; a child reuses
+    whatever its parent has already computed by slicing it. scaled() returns a
+    cached downscaled level of the frame.
+    With a classifier (color_lut.ColorClassifier) all masks are read from its
+    single-pass label image instead of HSV conversion and inRange.
+    """
+    def __init__(self, image_bgr, parent=None, origin=(0, 0), scale=1.0, classifier=None):
+        self.image = image_bgr
+        self.height, self.width = image_bgr.shape[:2]
+        self.origin = origin  # top-left corner inside the root frame, in this context's pixels
+        self.scale = scale    # this context's pixels per root frame pixel
+        self.classifier = classifier
+        self._parent = parent
+        self._levels = {}
+        self._labels = None
+        self._hsv = None
+        self._gray = None
+        self._black_mask = None
+        self._masks = {}
+
+    def _from_parent(self, attr, key=None):
+        parent = self._parent
+        if parent is None:
+            return None
+        value = getattr(parent, attr)
+        if key is not None:
+            value = value.get(key)
+        if value is None:
+            return None
+        y0 = self.origin[1] - parent.origin[1]
+        x0 = self.origin[0] - parent.origin[0]
+        return value[y0:y0 + self.height, x0:x0 + self.width]
+
+    @property
+    def hsv(self):
+        if self._hsv is None:
+            self._hsv = self._from_parent('_hsv')
+            if self._hsv is None:
+                self._hsv = cv2.cvtColor(self.image, cv2.COLOR_BGR2HSV)
+        return self._hsv
+
+    @property
+    def gray(self):
+        if self._gray is None:
+            self._gray = self._from_parent('_gray')
+            if self._gray is None:
+                self._gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    @property
+    def labels(self):
+        """Class label image from the classifier (one bit per class)."""
+        if self._labels is None:
+            self._labels = self._from_parent('_labels')
+            if self._labels is None:
+                self._labels = self.classifier.classify(self.image)
+        return self._labels
+
+    @property
+    def black_mask(self):
+        if self._black_mask is None:
+            self._black_mask = self._from_parent('_black_mask')
+            if self._black_mask is None:
+                if self.classifier is not None:
+                    self._black_mask = self.classifier.mask(self.labels, WALL_MASK)
+                else:
+                    _, self._black_mask = cv2.threshold(self.gray, WALL_BLACK_THRESHOLD, 255, cv2.THRESH_BINARY_INV)
+        return self._black_mask
+
+    def sub(self, left, top, right, bottom):
+        """Child context over image[top:bottom, left:right] (pixel bounds, no copy)."""
+        left, top = max(0, left), max(0, top)
+        right, bottom = min(self.width, right), min(self.height, bottom)
+        if (left, top, right, bottom) == (0, 0, self.width, self.height):
+            return self
+        origin = (self.origin[0] + left, self.origin[1] + top)
+        return FrameContext(self.image[top:bottom, left:right], parent=self, origin=origin, scale=self.scale,
+                            classifier=self.classifier)
+
+    def scaled(self, factor):
+        """
+        Context over this image resized by factor (cached). Factors below 0.5
+        are built from the 0.5 level, so 0.25 reuses the half-resolution image.
+        """
+        if factor == 1:
+            return self
+        level = self._levels.get(factor)
+        if level is None:
+            if factor < 0.5:
+                level = self.scaled(0.5).scaled(factor / 0.5)
+            else:
+                size = (max(1, int(round(self.width * factor))), max(1, int(round(self.height * factor))))
+                image = cv2.resize(self.image, size, interpolation=cv2.INTER_AREA)
+                origin = (int(round(self.origin[0] * factor)), int(round(self.origin[1] * factor)))
+                level = FrameContext(image, origin=origin, scale=self.scale * factor, classifier=self.classifier)
+            self._levels[factor] = level
+        return level
+
+    def roi(self, fractions):
+        """Child context for a (left, top, right, bottom) ROI given as fractions of this context."""
+        if fractions is None:
+            return self
+        left, top, right, bottom = fractions
+        return self.sub(int(round(left * self.width)), int(round(top * self.height)),
+                        int(round(right * self.width)), int(round(bottom * self.height)))
+
+    def transform_to(self, ctx):
+        """
+        (k, dx, dy) mapping this context's coordinates into ctx: x_ctx = x * k + dx.
+        k is exactly 1 (and dx, dy integers) when both share the same scale.
+        """
+        if self.scale == ctx.scale:
+            return 1, self.origin[0] - ctx.origin[0], self.origin[1] - ctx.origin[1]
+        k = ctx.scale / self.scale
+        return k, self.origin[0] * k - ctx.origin[0], self.origin[1] * k - ctx.origin[1]
+
+    def mask(self, name):
+        """Return the named colour mask from MASK_RANGES, computing it on first use."""
+        mask = self._masks.get(name)
+        if mask is None:
+            mask = self._from_parent('_masks', name)
+        if mask is None and self.classifier is not None:
+            mask = self.classifier.mask(self.labels, name)
+        if mask is None:
+            ranges = MASK_RANGES[name]
+            mask = cv2.inRange(self.hsv, ranges[0][0], ranges[0][1])
+            for lower, upper in ranges[1:]:
+                mask = cv2.bitwise_or(mask, cv2.inRange(self.hsv, lower, upper))
+        self._masks[name] = mask
+        return mask
+
 
 def detect_blocks(image):
     """
     Detects red, green, blue, and yellow blocks in the image (expects BGR)
     Returns list of detected blocks with their positions in the image
     """
-    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    return detect_blocks_ctx(FrameContext(image), roi=FULL_FRAME, scale=1.0)
 
-    # Mask for RED objects
-    red_mask1 = cv2.inRange(hsv, HSC_SEEN_RED_LOWER1, HSC_SEEN_RED_UPPER1)
-    red_mask2 = cv2.inRange(hsv, HSC_SEEN_RED_LOWER2, HSC_SEEN_RED_UPPER2)
-    red_mask = cv2.bitwise_or(red_mask1, red_mask2)
-    # Mask for GREEN objects
-    green_mask = cv2.inRange(hsv, HSC_SEEN_GREEN_LOWER, HSC_SEEN_GREEN_UPPER)
-    # Mask for BLUE objects
-    blue_mask = cv2.inRange(hsv, HSC_SEEN_BLUE_LOWER, HSC_SEEN_BLUE_UPPER)
-    # Mask for YELLOW objects
-    yellow_mask = cv2.inRange(hsv, HSC_SEEN_YELLOW_LOWER, HSC_SEEN_YELLOW_UPPER)
 
+def detect_blocks_ctx(ctx, roi=None, scale=None):
+    """
+    detect_blocks() on a shared FrameContext, searching only DETECTOR_ROIS['blocks']
+    (or roi) at DETECTOR_SCALES['blocks'] (or scale).
+    """
+    level = ctx.scaled(DETECTOR_SCALES['blocks'] if scale is None else scale)
+    roi_ctx = level.roi(DETECTOR_ROIS['blocks'] if roi is None else roi)
+    k, dx, dy = roi_ctx.transform_to(ctx)
     detected_blocks = []
-    for mask, color_name in [
-        (red_mask, 'red_block'),      # Real RED object
-        (green_mask, 'green_block'),  # Real GREEN object
-        (blue_mask, 'blue_block'),    # Real BLUE object
-        (yellow_mask, 'orange_block') # Real YELLOW object
-    ]:
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    for mask_name, color_name in BLOCK_MASKS:
+        contours, _ = cv2.findContours(roi_ctx.mask(mask_name), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         for contour in contours:
-            if cv2.contourArea(contour) > 100:
+            area = cv2.contourArea(contour) * k * k
+            if area > 100:
                 x, y, w, h = cv2.boundingRect(contour)
+                if k == 1:
+                    x += dx
+                    y += dy
+                else:
+                    x, y = int(round(x * k + dx)), int(round(y * k + dy))
+                    w, h = int(round(w * k)), int(round(h * k))
                 center_x = x + w//2
                 center_y = y + h//2
                 detected_blocks.append({
                     'color': color_name,
                     'position': (center_x, center_y),
                     'size': (w, h),
-                    'area': cv2.contourArea(contour)
+                    'area': area
                 })
     return detected_blocks
 
 
-def detect_corners(image_bgr, draw_overlay=True):
+def detect_corners(image_bgr, draw_overlay=True, band_height=CORNER_BAND_HEIGHT, fit_line=False):
     """
     Detect orange and blue lines and return their order for steering suggestion.
     """
-    hsv = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2HSV)
-    orange_mask = cv2.inRange(hsv, ORANGE_HSV_LOWER, ORANGE_HSV_UPPER)
-    blue_mask = cv2.inRange(hsv, BLUE_HSV_LOWER, BLUE_HSV_UPPER)
-    h, w = image_bgr.shape[:2]
-    bottom_y = h - 1
-    def get_line_points(mask, color_bgr):
-        points = []
-        for x in range(w):
-            if mask[bottom_y, x] > 0:
-                points.append((x, bottom_y))
-        if len(points) < 2:
-            for y in range(h-2, h-10, -1):
-                for x in range(w):
-                    if mask[y, x] > 0:
-                        points.append((x, y))
-                if len(points) >= 2:
-                    break
-        if len(points) >= 2:
-            points = sorted(points, key=lambda pt: pt[0])
-            pt1, pt2 = points[0], points[-1]
-            if draw_overlay:
-                cv2.circle(image_bgr, pt1, 6, color_bgr, -1)
-                cv2.circle(image_bgr, pt2, 6, color_bgr, -1)
-                cv2.line(image_bgr, pt1, pt2, color_bgr, 2)
-            return pt1, pt2
+    return detect_corners_ctx(FrameContext(image_bgr), draw_overlay, band_height, fit_line, FULL_FRAME, 1.0)
+
+
+def band_line_points(mask, band_height=CORNER_BAND_HEIGHT, fit_line=False):
+    """
+    Find the left/right endpoints of a line crossing the bottom band of a mask.
+    Rows are taken from the bottom up until at least two hit pixels are found.
+    The leftmost and rightmost hits are returned as (x, y) points, or (None, None).
+    With fit_line=True, a line is fitted through every hit pixel in the used rows
+    and the endpoints are the sub-pixel projections of the extreme hits onto it.
+    """
+    h = mask.shape[0]
+    band = mask[max(0, h - band_height):][::-1] > 0  # row 0 is the bottom row
+    cum_hits = np.cumsum(np.count_nonzero(band, axis=1))
+    if cum_hits.size == 0 or cum_hits[-1] < 2:
         return None, None
+    n_rows = int(np.searchsorted(cum_hits, 2)) + 1
+    band = band[:n_rows]
+    if fit_line:
+        rows, xs = np.nonzero(band)
+        pts = np.column_stack((xs, h - 1 - rows)).astype(np.float32)
+        [vx, vy, x0, y0] = cv2.fitLine(pts, cv2.DIST_L2, 0, 0.01, 0.01).ravel()
+        if vx < 0:
+            vx, vy = -vx, -vy
+        t = (pts[:, 0] - x0) * vx + (pts[:, 1] - y0) * vy
+        t_min, t_max = t.min(), t.max()
+        return (float(x0 + t_min * vx), float(y0 + t_min * vy)), (float(x0 + t_max * vx), float(y0 + t_max * vy))
+    hit_cols = np.flatnonzero(band.any(axis=0))
+    x_left, x_right = int(hit_cols[0]), int(hit_cols[-1])
+    # Ties on x keep the scan order: first row for the left point, last row for the right
+    row_left = int(np.argmax(band[:, x_left]))
+    row_right = n_rows - 1 - int(np.argmax(band[::-1, x_right]))
+    return (x_left, h - 1 - row_left), (x_right, h - 1 - row_right)
+
+
+def detect_corners_ctx(ctx, draw_overlay=True, band_height=CORNER_BAND_HEIGHT, fit_line=False, roi=None, scale=None):
+    """
+    detect_corners() on a shared FrameContext. Overlays are drawn on ctx.image.
+    Only the bottom band_height rows (in ctx pixels) of DETECTOR_ROIS['corners']
+    (or roi) are converted and masked, at DETECTOR_SCALES['corners'] (or scale).
+    """
+    image_bgr = ctx.image
+    level = ctx.scaled(DETECTOR_SCALES['corners'] if scale is None else scale)
+    roi_ctx = level.roi(DETECTOR_ROIS['corners'] if roi is None else roi)
+    band_rows = max(1, int(np.ceil(band_height * level.scale / ctx.scale)))
+    band_ctx = roi_ctx.sub(0, roi_ctx.height - band_rows, roi_ctx.width, roi_ctx.height)
+    k, dx, dy = band_ctx.transform_to(ctx)
+    orange_mask = band_ctx.mask('line_orange')
+    blue_mask = band_ctx.mask('line_blue')
+    def get_line_points(mask, color_bgr):
+        pt1, pt2 = band_line_points(mask, band_rows, fit_line)
+        if pt1 is None:
+            return None, None
+        pt1 = (pt1[0] * k + dx, pt1[1] * k + dy)
+        pt2 = (pt2[0] * k + dx, pt2[1] * k + dy)
+        if k != 1 and not fit_line:
+            pt1 = (int(round(pt1[0])), int(round(pt1[1])))
+            pt2 = (int(round(pt2[0])), int(round(pt2[1])))
+        if draw_overlay:
+            ipt1 = (int(round(pt1[0])), int(round(pt1[1])))
+            ipt2 = (int(round(pt2[0])), int(round(pt2[1])))
+            cv2.circle(image_bgr, ipt1, 6, color_bgr, -1)
+            cv2.circle(image_bgr, ipt2, 6, color_bgr, -1)
+            cv2.line(image_bgr, ipt1, ipt2, color_bgr, 2)
+        return pt1, pt2
     orange_pt1, orange_pt2 = get_line_points(orange_mask, (0,140,255))
     blue_pt1, blue_pt2 = get_line_points(blue_mask, (255,0,0))
     def line_angle(pt1, pt2):
@@ -191,25 +423,71 @@ def detect_corners(image_bgr, draw_overlay=True):
     }
 
 
-def detect_wall_and_angle(image_bgr, visualize=False):
+def detect_wall_and_angle(image_bgr, visualize=False, return_profile=False):
     """
     Detects the proximity and angle of a black wall in the camera image.
+    With return_profile=True the result also holds 'wall_profile' (see wall_top_profile).
     """
-    gray = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2GRAY)
-    _, black_mask = cv2.threshold(gray, 40, 255, cv2.THRESH_BINARY_INV)
-    contours, _ = cv2.findContours(black_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return detect_wall_and_angle_ctx(FrameContext(image_bgr), visualize, return_profile, FULL_FRAME, 1.0)
+
+
+def wall_top_edge(contour):
+    """
+    Upper envelope of a contour: for every x it touches, the smallest y.
+    Returns an (N, 2) int32 array of [x, y] points sorted by x.
+    """
+    xs = contour[:, 0, 0]
+    ys = contour[:, 0, 1]
+    order = np.lexsort((ys, xs))
+    xs = xs[order]
+    ys = ys[order]
+    first = np.empty(xs.shape, dtype=bool)
+    first[:1] = True
+    np.not_equal(xs[1:], xs[:-1], out=first[1:])
+    return np.column_stack((xs[first], ys[first])).astype(np.int32)
+
+
+def wall_top_profile(edge_pts, width):
+    """
+    Per-column wall-top y as an int32 array of length width, -1 outside the wall.
+    Columns between edge points (compressed contour runs, or a detector that ran
+    on a downscaled level) are linearly interpolated.
+    """
+    profile = np.full(width, -1, dtype=np.int32)
+    x_min = max(0, int(edge_pts[0, 0]))
+    x_max = min(width - 1, int(edge_pts[-1, 0]))
+    if x_min <= x_max:
+        cols = np.arange(x_min, x_max + 1)
+        profile[x_min:x_max + 1] = np.rint(np.interp(cols, edge_pts[:, 0], edge_pts[:, 1]))
+    return profile
+
+
+def detect_wall_and_angle_ctx(ctx, visualize=False, return_profile=False, roi=None, scale=None):
+    """
+    detect_wall_and_angle() on a shared FrameContext, searching only DETECTOR_ROIS['wall']
+    (or roi) at DETECTOR_SCALES['wall'] (or scale).
+    """
+    level = ctx.scaled(DETECTOR_SCALES['wall'] if scale is None else scale)
+    roi_ctx = level.roi(DETECTOR_ROIS['wall'] if roi is None else roi)
+    k, dx, dy = roi_ctx.transform_to(ctx)
+    if k == 1:
+        contours, _ = cv2.findContours(roi_ctx.black_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=(dx, dy))
+    else:
+        contours, _ = cv2.findContours(roi_ctx.black_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
     if not contours:
-        return {'wall_y': None, 'wall_angle': None, 'steer': 'straight', 'viz': None} if visualize else {'wall_y': None, 'wall_angle': None, 'steer': 'straight'}
+        result = {'wall_y': None, 'wall_angle': None, 'steer': 'straight', 'viz': None} if visualize else {'wall_y': None, 'wall_angle': None, 'steer': 'straight'}
+        if return_profile:
+            result['wall_profile'] = None
+        return result
     largest = max(contours, key=cv2.contourArea)
-    ys = largest[:,0,1]
-    xs = largest[:,0,0]
-    wall_points = {}
-    for x, y in zip(xs, ys):
-        if x not in wall_points or y < wall_points[x]:
-            wall_points[x] = y
-    if len(wall_points) < 2:
-        return {'wall_y': None, 'wall_angle': None, 'steer': 'straight', 'viz': None} if visualize else {'wall_y': None, 'wall_angle': None, 'steer': 'straight'}
-    edge_pts = np.array([[x, wall_points[x]] for x in sorted(wall_points.keys())])
+    edge_pts = wall_top_edge(largest)
+    if k != 1:
+        edge_pts = np.rint(edge_pts * k + (dx, dy)).astype(np.int32)
+    if len(edge_pts) < 2:
+        result = {'wall_y': None, 'wall_angle': None, 'steer': 'straight', 'viz': None} if visualize else {'wall_y': None, 'wall_angle': None, 'steer': 'straight'}
+        if return_profile:
+            result['wall_profile'] = None
+        return result
     left_pt = edge_pts[0]
     right_pt = edge_pts[-1]
     if left_pt[1] < right_pt[1]:
@@ -221,9 +499,9 @@ def detect_wall_and_angle(image_bgr, visualize=False):
     else:
         steer = 'straight'
         steer_reason = 'edge y equal'
-    [vx, vy, x0, y0] = cv2.fitLine(edge_pts, cv2.DIST_L2, 0, 0.01, 0.01)
+    vx, vy, x0, y0 = cv2.fitLine(edge_pts, cv2.DIST_L2, 0, 0.01, 0.01).ravel()
     angle_rad = np.arctan2(vy, vx)
-    angle_deg = np.degrees(angle_rad)[0]
+    angle_deg = np.degrees(angle_rad)
     wall_y = int(np.mean(edge_pts[:,1]))
     if visualize:
         viz = {
@@ -236,6 +514,9 @@ def detect_wall_and_angle(image_bgr, visualize=False):
             'right_pt': right_pt,
             'steer_reason': steer_reason
         }
-        return {'wall_y': wall_y, 'wall_angle': angle_deg, 'steer': steer, 'viz': viz}
+        result = {'wall_y': wall_y, 'wall_angle': angle_deg, 'steer': steer, 'viz': viz}
     else:
-        return {'wall_y': wall_y, 'wall_angle': angle_deg, 'steer': steer, 'left_pt': left_pt, 'right_pt': right_pt, 'steer_reason': steer_reason} 
\ No newline at end of file
+        result = {'wall_y': wall_y, 'wall_angle': angle_deg, 'steer': steer, 'left_pt': left_pt, 'right_pt': right_pt, 'steer_reason': steer_reason}
+    if return_profile:
+        result['wall_profile'] = wall_top_profile(edge_pts, ctx.width)
+    return result 
\ No newline at end of file